@@ -6,11 +6,13 @@ const router = express.Router();
 const paymentService = require('../services/payment');
 const rugDetector = require('../services/rugDetector');
 const { getPaymentTracker } = require('../services/paymentTracker');
+const { getResultCache } = require('../services/resultCache');
 const x402 = require('../services/x402');
 const zkml = require('../services/zkmlProver');
 
 // Initialize payment tracker
 const paymentTracker = getPaymentTracker();
+const resultCache = getResultCache();
 
 // POST /check - Analyze contract for rug pull risk
 router.post('/', async (req, res) => {
@@ -176,6 +178,16 @@ router.post('/', async (req, res) => {
       }
     }
 
+    // Reuse a recent analysis of the same contract (payment is still consumed above)
+    const cached = resultCache.get(contract_address, blockchain);
+    if (cached) {
+      console.log(`[Check] Cache hit for ${contract_address} on ${blockchain}`);
+      return res.json({
+        success: true,
+        data: { ...cached, contract_address, blockchain, cached: true }
+      });
+    }
+
     // Step 2: Extract features from contract
     console.log(`[Check] Extracting features from ${contract_address} on ${blockchain}`);
     let features, zkmlFeatures;
@@ -271,19 +283,26 @@ router.post('/', async (req, res) => {
     }
 
     // Return successful response with zkML proof
+    const data = {
+      contract_address,
+      blockchain,
+      riskScore: analysis.riskScore,
+      riskCategory: analysis.riskCategory,
+      confidence: analysis.confidence,
+      features: features,
+      recommendation: recommendation,
+      analysis_timestamp: new Date().toISOString(),
+      zkml: zkmlProof
+    };
+    // Only cache real results: a transient prover or RPC failure (error proof,
+    // simulated fallback features) must not be replayed to later callers
+    if (zkmlProof.verified === true && !rugDetector.isSimulated(features)) {
+      resultCache.set(contract_address, blockchain, data);
+    }
+
     res.json({
       success: true,
-      data: {
-        contract_address,
-        blockchain,
-        riskScore: analysis.riskScore,
-        riskCategory: analysis.riskCategory,
-        confidence: analysis.confidence,
-        features: features,
-        recommendation: recommendation,
-        analysis_timestamp: new Date().toISOString(),
-        zkml: zkmlProof
-      }
+      data
     });
 
   } catch (error) {
@@ -114,17 +114,24 @@ app.get('/', (req, res) => {
   res.sendFile(path.join(__dirname, '../ui/index.html'));
 });
 
-// Start server
-app.listen(PORT, () => {
-  console.log(`🚀 RugDetector running on http://localhost:${PORT}`);
-  console.log(`🎨 Web UI: http://localhost:${PORT}`);
-  console.log(`📋 Service discovery: http://localhost:${PORT}/.well-known/ai-service.json`);
-  console.log(`💚 Health check: http://localhost:${PORT}/health`);
-  console.log(`🔌 API endpoint: POST http://localhost:${PORT}/check`);
-  console.log('');
-  console.log('🛡️  Security Features Enabled:');
-  console.log(`   • Global rate limit: ${process.env.RATE_LIMIT_MAX_REQUESTS || '60'} req/min per IP`);
-  console.log(`   • Payment rate limit: ${process.env.PAYMENT_RATE_LIMIT_MAX || '30'} verifications/min per IP`);
-  console.log(`   • Payment replay prevention: Active (TTL: ${process.env.PAYMENT_CACHE_TTL_SECONDS || '3600'}s)`);
-  console.log(`   • Request payload limit: 1kb`);
-});
+// Start server once the model and feature extractor are warm; a failed
+// warm-up is not fatal, the first request loads lazily instead
+require('./services/rugDetector').warmUp()
+  .catch((error) => console.error('[Server] Warm-up failed:', error.message))
+  .finally(startServer);
+
+function startServer() {
+  app.listen(PORT, () => {
+    console.log(`🚀 RugDetector running on http://localhost:${PORT}`);
+    console.log(`🎨 Web UI: http://localhost:${PORT}`);
+    console.log(`📋 Service discovery: http://localhost:${PORT}/.well-known/ai-service.json`);
+    console.log(`💚 Health check: http://localhost:${PORT}/health`);
+    console.log(`🔌 API endpoint: POST http://localhost:${PORT}/check`);
+    console.log('');
+    console.log('🛡️  Security Features Enabled:');
+    console.log(`   • Global rate limit: ${process.env.RATE_LIMIT_MAX_REQUESTS || '60'} req/min per IP`);
+    console.log(`   • Payment rate limit: ${process.env.PAYMENT_RATE_LIMIT_MAX || '30'} verifications/min per IP`);
+    console.log(`   • Payment replay prevention: Active (TTL: ${process.env.PAYMENT_CACHE_TTL_SECONDS || '3600'}s)`);
+    console.log(`   • Request payload limit: 1kb`);
+  });
+}
@@ -0,0 +1,103 @@
+/**
+ * Result Cache Service
+ * Reuses recent /check analyses for the same contract
+ *
+ * On-chain features change slowly, so a contract checked again within the
+ * TTL is answered from memory instead of re-running feature extraction,
+ * inference and proving. Payments are still verified and consumed per call.
+ */
+
+class ResultCache {
+  constructor(ttl = 300000, maxEntries = 4096) { // Default: 5 minute TTL
+    this.entries = new Map(); // insertion order doubles as LRU order
+    this.ttl = ttl; // Time to live in milliseconds
+    this.maxEntries = maxEntries;
+
+    console.log('[ResultCache] Initialized with TTL:', ttl, 'ms, max entries:', maxEntries);
+  }
+
+  /**
+   * Build the cache key for a contract
+   * EVM addresses are case-insensitive hex; Solana base58 is case-sensitive
+   * @param {string} contractAddress
+   * @param {string} blockchain
+   * @returns {string}
+   */
+  key(contractAddress, blockchain) {
+    const chain = blockchain.toLowerCase();
+    const address = chain === 'solana' ? contractAddress : contractAddress.toLowerCase();
+    return `${chain}|${address}`;
+  }
+
+  /**
+   * Get a cached result
+   * @param {string} contractAddress
+   * @param {string} blockchain
+   * @returns {object|null} cached result, or null if missing or expired
+   */
+  get(contractAddress, blockchain) {
+    const key = this.key(contractAddress, blockchain);
+    const entry = this.entries.get(key);
+
+    if (!entry) {
+      return null;
+    }
+
+    // Check if entry has expired
+    if (Date.now() - entry.timestamp > this.ttl) {
+      this.entries.delete(key);
+      return null;
+    }
+
+    // Move to the most recently used end
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  /**
+   * Store a result, evicting the least recently used entry when full
+   * @param {string} contractAddress
+   * @param {string} blockchain
+   * @param {object} value
+   */
+  set(contractAddress, blockchain, value) {
+    const key = this.key(contractAddress, blockchain);
+
+    this.entries.delete(key);
+    if (this.entries.size >= this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+
+    this.entries.set(key, { timestamp: Date.now(), value });
+  }
+
+  /**
+   * Clear all cached results (for testing)
+   */
+  clear() {
+    this.entries.clear();
+    console.log('[ResultCache] All cached results cleared');
+  }
+}
+
+// Singleton instance
+let cacheInstance = null;
+
+/**
+ * Get or create the result cache instance
+ * @returns {ResultCache}
+ */
+function getResultCache() {
+  if (!cacheInstance) {
+    const ttlMs = parseInt(process.env.RESULT_CACHE_TTL_SECONDS || '300') * 1000;
+    const maxEntries = parseInt(process.env.RESULT_CACHE_MAX_ENTRIES || '4096');
+    cacheInstance = new ResultCache(ttlMs, maxEntries);
+  }
+  return cacheInstance;
+}
+
+module.exports = {
+  ResultCache,
+  getResultCache
+};
@@ -2,87 +2,202 @@
 // ONNX model inference for smart contract risk analysis
 
 const { spawn } = require('child_process');
+const fs = require('fs');
 const path = require('path');
+const readline = require('readline');
 const onnx = require('onnxruntime-node');
 
 // Configuration
 const PYTHON_PATH = process.env.PYTHON_PATH || 'python3';
 const FEATURE_EXTRACTOR_PATH = path.join(__dirname, '../../model/extract_features.py');
-const MODEL_PATH = path.join(__dirname, '../../model/rugdetector_v1.onnx');
+const BASE_MODEL_PATH = path.join(__dirname, '../../model/rugdetector_v1.onnx');
+const OPTIMIZED_MODEL_PATH = path.join(__dirname, '../../model/rugdetector_v1_opt.onnx');
+const MODEL_PATH = resolveModelPath();
 const ZKML_MODEL_PATH = path.join(__dirname, '../../model/zkml_rugdetector.onnx');
 const ZKML_SCALER_PATH = path.join(__dirname, '../../model/zkml_rugdetector_scaler.pkl');
 
 // Use zkML model for proof generation
 const USE_ZKML_MODEL = process.env.USE_ZKML_MODEL !== 'false';
 
-// Cache for ONNX session
+// Cache for ONNX sessions
 let cachedSession = null;
+let cachedZkmlSession = null;
+
+// Probability output of the cached session, resolved by name at load time
+// or by probing output types on the first inference
+let cachedProbOutputName = null;
+
+// Single-sample inference on tiny models: full graph optimization, no thread pool fan-out.
+// Input shapes are fixed, so ORT can plan buffer reuse once (memory pattern).
+// Used by both sessions, so each graph is specialized once at load time
+const SESSION_OPTIONS = Object.freeze({
+  graphOptimizationLevel: 'all',
+  intraOpNumThreads: 1,
+  interOpNumThreads: 1,
+  enableMemPattern: true
+});
+
+// rugdetector_v1_opt.onnx already has ORT's graph optimizations applied
+// (optimize_onnx.py), so loading it skips the optimizer passes
+const MODEL_SESSION_OPTIONS = MODEL_PATH === OPTIMIZED_MODEL_PATH
+  ? Object.freeze({ ...SESSION_OPTIONS, graphOptimizationLevel: 'disabled' })
+  : SESSION_OPTIONS;
+
+// Long-lived feature extractors (extract_features.py --stdio): a small pool of
+// Python interpreters kept for the server's lifetime, newline-delimited JSON
+// both ways. Each worker runs one request at a time; requests wait in a
+// shared queue and their 30 s timeout starts when a worker picks them up.
+const EXTRACTION_TIMEOUT_MS = 30000;
+const EXTRACTOR_POOL_SIZE = Math.max(1, parseInt(process.env.FEATURE_EXTRACTOR_WORKERS || '2'));
+const extractorPool = [];
+const extractionQueue = [];
+let nextExtractionId = 0;
+
+// Feature objects (and zkML vectors derived from them) that came from the
+// simulated fallback rather than on-chain data
+const simulatedFeatures = new WeakSet();
 
 /**
- * Extract blockchain features from smart contract
- * Calls Python script as subprocess
- * @param {string} contractAddress - Contract address (0x...)
- * @param {string} blockchain - Blockchain name (ethereum, bsc, polygon)
- * @returns {Promise<Object>} - 60 features as key-value pairs
+ * Whether features were simulated instead of extracted from chain data
+ * @param {Object|Array<number>} features - From extractFeatures or extractZkmlFeatures
+ * @returns {boolean}
  */
-async function extractFeatures(contractAddress, blockchain) {
-  return new Promise((resolve, reject) => {
-    console.log(`[RugDetector] Spawning Python process for feature extraction`);
+function isSimulated(features) {
+  return simulatedFeatures.has(features);
+}
 
-    // Spawn Python subprocess
-    const pythonProcess = spawn(PYTHON_PATH, [
-      FEATURE_EXTRACTOR_PATH,
-      contractAddress,
-      blockchain
-    ]);
+/**
+ * Start one extractor worker and add it to the pool
+ * @returns {{process: ChildProcess, current: Object|null, alive: boolean}}
+ */
+function startExtractorWorker() {
+  console.log(`[RugDetector] Starting feature extraction worker`);
+  const pythonProcess = spawn(PYTHON_PATH, [FEATURE_EXTRACTOR_PATH, '--stdio']);
+  const worker = { process: pythonProcess, current: null, alive: true };
+
+  // Detach the in-flight request (if any) from the worker and return it
+  const takeCurrent = () => {
+    const request = worker.current;
+    if (request) {
+      clearTimeout(request.timer);
+      worker.current = null;
+    }
+    return request;
+  };
+
+  // Drop the worker from the pool. Only its own in-flight request fails;
+  // queued requests go to the other workers or a replacement
+  const retire = (error) => {
+    if (!worker.alive) return;
+    worker.alive = false;
+    extractorPool.splice(extractorPool.indexOf(worker), 1);
+
+    const request = takeCurrent();
+    if (request) request.reject(error);
+    dispatchExtractions();
+  };
+  worker.retire = retire;
+  worker.takeCurrent = takeCurrent;
+
+  readline.createInterface({ input: pythonProcess.stdout }).on('line', (line) => {
+    let response;
+    try {
+      response = JSON.parse(line);
+    } catch (parseError) {
+      console.error(`[RugDetector] Failed to parse Python output:`, line);
+      return;
+    }
 
-    let stdout = '';
-    let stderr = '';
+    if (!worker.current || worker.current.id !== response.id) return;  // already timed out
+    const request = takeCurrent();
 
-    // Collect stdout
-    pythonProcess.stdout.on('data', (data) => {
-      stdout += data.toString();
-    });
+    if (response.error) {
+      request.reject(new Error(`Feature extraction failed: ${response.error}`));
+    } else {
+      console.log(`[RugDetector] Successfully extracted ${Object.keys(response.features).length} features (${response.source})`);
+      if (response.source !== 'real') simulatedFeatures.add(response.features);
+      request.resolve(response.features);
+    }
+    dispatchExtractions();
+  });
 
-    // Collect stderr
-    pythonProcess.stderr.on('data', (data) => {
-      stderr += data.toString();
-      console.error(`[RugDetector] Python stderr: ${data}`);
-    });
+  pythonProcess.stderr.on('data', (data) => {
+    console.error(`[RugDetector] Python stderr: ${data}`);
+  });
 
-    // Handle process completion
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error(`[RugDetector] Python process exited with code ${code}`);
-        console.error(`[RugDetector] stderr: ${stderr}`);
-        return reject(new Error(`Feature extraction failed with exit code ${code}`));
-      }
+  // Writes after the worker died (EPIPE) surface here; 'close' retires the worker
+  pythonProcess.stdin.on('error', (error) => {
+    console.error(`[RugDetector] Feature extraction worker stdin error:`, error.message);
+  });
 
-      try {
-        // Parse JSON output
-        const features = JSON.parse(stdout);
-        console.log(`[RugDetector] Successfully extracted ${Object.keys(features).length} features`);
-        resolve(features);
-      } catch (parseError) {
-        console.error(`[RugDetector] Failed to parse Python output:`, stdout);
-        reject(new Error('Failed to parse feature extraction output'));
-      }
-    });
+  pythonProcess.on('close', (code) => {
+    console.error(`[RugDetector] Feature extraction worker exited with code ${code}`);
+    retire(new Error(`Feature extraction failed with exit code ${code}`));
+  });
 
-    // Handle process errors
-    pythonProcess.on('error', (error) => {
-      console.error(`[RugDetector] Failed to spawn Python process:`, error);
-      reject(new Error(`Failed to run feature extraction: ${error.message}`));
-    });
+  pythonProcess.on('error', (error) => {
+    console.error(`[RugDetector] Failed to spawn Python process:`, error);
+    retire(new Error(`Failed to run feature extraction: ${error.message}`));
+  });
+
+  extractorPool.push(worker);
+  return worker;
+}
+
+/**
+ * Hand queued requests to idle workers, starting workers up to the pool size
+ */
+function dispatchExtractions() {
+  while (extractionQueue.length > 0) {
+    let worker = extractorPool.find(w => !w.current);
+    if (!worker) {
+      if (extractorPool.length >= EXTRACTOR_POOL_SIZE) return;
+      worker = startExtractorWorker();
+    }
 
-    // Set timeout (30 seconds)
-    setTimeout(() => {
-      pythonProcess.kill();
-      reject(new Error('Feature extraction timed out after 30 seconds'));
-    }, 30000);
+    const request = extractionQueue.shift();
+    worker.current = request;
+
+    // Timeout (30 seconds) counts from dispatch. A worker stuck on a request
+    // can't take another, so it is replaced rather than waited for
+    request.timer = setTimeout(() => {
+      if (worker.current !== request) return;
+      worker.takeCurrent();
+      request.reject(new Error('Feature extraction timed out after 30 seconds'));
+      worker.retire(new Error('Feature extraction worker timed out'));
+      worker.process.kill();
+    }, EXTRACTION_TIMEOUT_MS);
+
+    worker.process.stdin.write(JSON.stringify({
+      id: request.id,
+      contract_address: request.contractAddress,
+      blockchain: request.blockchain
+    }) + '\n');
+  }
+}
+
+/**
+ * Extract blockchain features from smart contract
+ * Queued for the pool of long-lived Python extractor workers
+ * @param {string} contractAddress - Contract address (0x...)
+ * @param {string} blockchain - Blockchain name (ethereum, bsc, polygon)
+ * @returns {Promise<Object>} - 60 features as key-value pairs
+ */
+async function extractFeatures(contractAddress, blockchain) {
+  return new Promise((resolve, reject) => {
+    extractionQueue.push({ id: nextExtractionId++, contractAddress, blockchain, resolve, reject, timer: null });
+    dispatchExtractions();
   });
 }
 
+// Risk tiers in priority order; each maps its class probability from
+// (threshold, 1] onto [scoreBase, scoreBase + scoreSpan]
+const RISK_TIERS = Object.freeze([
+  { category: 'high', classIndex: 2, threshold: 0.6, scoreBase: 0.6, scoreSpan: 0.4 },   // 0.6-1.0
+  { category: 'medium', classIndex: 1, threshold: 0.5, scoreBase: 0.3, scoreSpan: 0.3 }, // 0.3-0.6
+  { category: 'low', classIndex: 0, threshold: 0, scoreBase: 0, scoreSpan: 0.3 }         // 0.0-0.3
+]);
+
 /**
  * Load ONNX model session (cached)
  * @returns {Promise<InferenceSession>}
@@ -94,7 +209,12 @@ async function loadModel() {
 
   console.log(`[RugDetector] Loading ONNX model from ${MODEL_PATH}`);
   try {
-    cachedSession = await onnx.InferenceSession.create(MODEL_PATH);
+    cachedSession = await onnx.InferenceSession.create(MODEL_PATH, MODEL_SESSION_OPTIONS);
+
+    const names = cachedSession.outputNames || [];
+    if (names.includes('output_probability')) cachedProbOutputName = 'output_probability';
+    else if (names.includes('probabilities')) cachedProbOutputName = 'probabilities';
+
     console.log(`[RugDetector] Model loaded successfully`);
     return cachedSession;
   } catch (error) {
@@ -103,6 +223,46 @@ async function loadModel() {
   }
 }
 
+/**
+ * Pick the classifier model file
+ * RUGDETECTOR_MODEL_PATH wins; otherwise the pre-optimized model written by
+ * train_model.py, unless it is missing or older than the base model
+ * @returns {string}
+ */
+function resolveModelPath() {
+  if (process.env.RUGDETECTOR_MODEL_PATH) {
+    return path.resolve(process.env.RUGDETECTOR_MODEL_PATH);
+  }
+  try {
+    if (fs.statSync(OPTIMIZED_MODEL_PATH).mtimeMs >= fs.statSync(BASE_MODEL_PATH).mtimeMs) {
+      return OPTIMIZED_MODEL_PATH;
+    }
+  } catch (error) {
+    // No optimized model (or no base model to compare against): use the base path
+  }
+  return BASE_MODEL_PATH;
+}
+
+/**
+ * Load zkML ONNX model session (cached)
+ * @returns {Promise<InferenceSession>}
+ */
+async function loadZkmlModel() {
+  if (cachedZkmlSession) {
+    return cachedZkmlSession;
+  }
+
+  console.log(`[RugDetector] Loading zkML ONNX model from ${ZKML_MODEL_PATH}`);
+  try {
+    cachedZkmlSession = await onnx.InferenceSession.create(ZKML_MODEL_PATH, SESSION_OPTIONS);
+    console.log(`[RugDetector] zkML model loaded successfully`);
+    return cachedZkmlSession;
+  } catch (error) {
+    console.error(`[RugDetector] Failed to load zkML ONNX model:`, error);
+    throw new Error(`Failed to load zkML model: ${error.message}`);
+  }
+}
+
 /**
  * Analyze contract using ONNX model
  * @param {Object} features - 60 features extracted from contract
@@ -113,40 +273,42 @@ async function analyzeContract(features) {
     // Load model
     const session = await loadModel();
 
-    // Convert features object to array (must match training order)
-    const featureArray = convertFeaturesToArray(features);
+    const probTensor = await runExclusive(async () => {
+      // Convert features into the shared input buffer (must match training order)
+      convertFeaturesToArray(features, inputBuffer);
+
+      console.log(`[RugDetector] Running ONNX inference`);
+
+      // Run and pick probability tensor. When its name is known, fetch only that
+      // output so ORT doesn't materialize the label tensor on every call.
+      let probName = cachedProbOutputName;
+      let results;
+
+      if (probName) {
+        results = await session.run({ float_input: inputTensor }, [probName]);
+      } else {
+        results = await session.run({ float_input: inputTensor });
+
+        // find first float tensor output by inspecting result types
+        const names = session.outputNames || [];
+        for (const n of names) {
+          const v = results[n];
+          if (v && v.data && (v.data instanceof Float32Array || v.data instanceof Float64Array)) {
+            probName = n; break;
+          }
+        }
 
-    // Create input tensor
-    const inputTensor = new onnx.Tensor('float32', Float32Array.from(featureArray), [1, 60]);
-
-    console.log(`[RugDetector] Running ONNX inference`);
-
-    // Try Node inference. If model outputs include non-tensor types (ZipMap),
-    // onnxruntime-node will throw. In that case, fallback to Python inference.
-    // Run and pick probability tensor. Prefer a float tensor output; avoid non-tensor outputs.
-    const results = await session.run({ float_input: inputTensor });
-
-    const names = session.outputNames || [];
-    let probName = null;
-    // common names
-    if (names.includes('output_probability')) probName = 'output_probability';
-    else if (names.includes('probabilities')) probName = 'probabilities';
-    else {
-      // find first float tensor output by inspecting result types
-      for (const n of names) {
-        const v = results[n];
-        if (v && v.data && (v.data instanceof Float32Array || v.data instanceof Float64Array)) {
-          probName = n; break;
+        if (!probName) {
+          throw new Error('No float probability tensor found in ONNX outputs: ' + JSON.stringify(names));
         }
-      }
-    }
 
-    if (!probName) {
-      throw new Error('No float probability tensor found in ONNX outputs: ' + JSON.stringify(names));
-    }
+        // Output layout is fixed per model; later calls take the direct path above
+        cachedProbOutputName = probName;
+      }
 
-    const probTensor = results[probName];
-    const probabilities = Array.from(probTensor.data);
+      return results[probName];
+    });
+    const probabilities = probTensor.data;  // typed array, read in place
 
     console.log(`[RugDetector] Model output classes: ${probabilities.length}`);
 
@@ -167,24 +329,14 @@ async function analyzeContract(features) {
       console.log(`[RugDetector] 3-class model - Low: ${lowRiskProb.toFixed(3)}, Medium: ${mediumRiskProb.toFixed(3)}, High: ${highRiskProb.toFixed(3)}`);
     }
 
-    // Determine risk category and score
-    let riskCategory;
-    let riskScore;
-    let confidence;
+    // Determine risk category and score: first tier whose class probability
+    // clears its threshold, mapped linearly into that tier's score band
+    const classProbs = [lowRiskProb, mediumRiskProb, highRiskProb];
+    const tier = RISK_TIERS.find(t => classProbs[t.classIndex] > t.threshold) || RISK_TIERS[RISK_TIERS.length - 1];
 
-    if (highRiskProb > 0.6) {
-      riskCategory = 'high';
-      riskScore = 0.6 + (highRiskProb - 0.6) * 0.4 / 0.4; // Map to 0.6-1.0
-      confidence = highRiskProb;
-    } else if (mediumRiskProb > 0.5) {
-      riskCategory = 'medium';
-      riskScore = 0.3 + (mediumRiskProb - 0.5) * 0.3 / 0.5; // Map to 0.3-0.6
-      confidence = mediumRiskProb;
-    } else {
-      riskCategory = 'low';
-      riskScore = lowRiskProb * 0.3; // Map to 0.0-0.3
-      confidence = lowRiskProb;
-    }
+    const riskCategory = tier.category;
+    const confidence = classProbs[tier.classIndex];
+    const riskScore = tier.scoreBase + (confidence - tier.threshold) * tier.scoreSpan / (1 - tier.threshold);
 
     return {
       riskScore: Math.round(riskScore * 100) / 100, // Round to 2 decimals
@@ -205,83 +357,98 @@ async function analyzeContract(features) {
 
 // Python fallback removed after confirming ONNX model outputs tensor probabilities
 
+// Feature order (must match training)
+const FEATURE_ORDER = Object.freeze([
+  // Ownership features (10)
+  'hasOwnershipTransfer', 'hasRenounceOwnership', 'ownerBalance', 'ownerTransactionCount',
+  'multipleOwners', 'ownershipChangedRecently', 'ownerContractAge', 'ownerIsContract',
+  'ownerBlacklisted', 'ownerVerified',
+
+  // Liquidity features (12)
+  'hasLiquidityLock', 'liquidityPoolSize', 'liquidityRatio', 'hasUniswapV2',
+  'hasPancakeSwap', 'liquidityLockedDays', 'liquidityProvidedByOwner', 'multiplePoolsExist',
+  'poolCreatedRecently', 'lowLiquidityWarning', 'rugpullHistoryOnDEX', 'slippageTooHigh',
+
+  // Holder analysis (10)
+  'holderCount', 'holderConcentration', 'top10HoldersPercent', 'averageHoldingTime',
+  'suspiciousHolderPatterns', 'whaleCount', 'holderGrowthRate', 'dormantHolders',
+  'newHoldersSpiking', 'sellingPressure',
+
+  // Contract code features (15)
+  'hasHiddenMint', 'hasPausableTransfers', 'hasBlacklist', 'hasWhitelist',
+  'hasTimelocks', 'complexityScore', 'hasProxyPattern', 'isUpgradeable',
+  'hasExternalCalls', 'hasSelfDestruct', 'hasDelegateCall', 'hasInlineAssembly',
+  'verifiedContract', 'auditedByFirm', 'openSourceCode',
+
+  // Transaction patterns (8)
+  'avgDailyTransactions', 'transactionVelocity', 'uniqueInteractors', 'suspiciousPatterns',
+  'highFailureRate', 'gasOptimized', 'flashloanInteractions', 'frontRunningDetected',
+
+  // Time-based features (5)
+  'contractAge', 'lastActivityDays', 'creationBlock', 'deployedDuringBullMarket',
+  'launchFairness'
+]);
+
+const NUM_FEATURES = FEATURE_ORDER.length;
+
+if (NUM_FEATURES !== 60) {
+  throw new Error(`Expected 60 features, got ${NUM_FEATURES}`);
+}
+
+// Input buffer and tensor shared by every analyzeContract call (the tensor
+// wraps the buffer, no copy). Fill-and-run is serialized so a request never
+// overwrites the input of another request's pending run.
+const inputBuffer = new Float32Array(NUM_FEATURES);
+const inputTensor = new onnx.Tensor('float32', inputBuffer, [1, NUM_FEATURES]);
+let inferenceQueue = Promise.resolve();
+
+/**
+ * Run task after every previously queued one has settled
+ * @param {Function} task - async function using the shared input buffer
+ * @returns {Promise<*>} - task's result
+ */
+function runExclusive(task) {
+  const run = inferenceQueue.then(task);
+  inferenceQueue = run.catch(() => {});
+  return run;
+}
+
 /**
  * Convert features object to ordered array for ONNX model
  * Must match the order used during training
  * @param {Object} features - Features object
- * @returns {Array<number>} - 60-element array
+ * @param {Float32Array} [featureArray] - 60-element buffer to fill (reused across calls)
+ * @returns {Float32Array} - 60-element array, ready to back an ONNX tensor
  */
-function convertFeaturesToArray(features) {
-  // Define feature order (must match training)
-  const featureOrder = [
-    // Ownership features (10)
-    'hasOwnershipTransfer', 'hasRenounceOwnership', 'ownerBalance', 'ownerTransactionCount',
-    'multipleOwners', 'ownershipChangedRecently', 'ownerContractAge', 'ownerIsContract',
-    'ownerBlacklisted', 'ownerVerified',
-
-    // Liquidity features (12)
-    'hasLiquidityLock', 'liquidityPoolSize', 'liquidityRatio', 'hasUniswapV2',
-    'hasPancakeSwap', 'liquidityLockedDays', 'liquidityProvidedByOwner', 'multiplePoolsExist',
-    'poolCreatedRecently', 'lowLiquidityWarning', 'rugpullHistoryOnDEX', 'slippageTooHigh',
-
-    // Holder analysis (10)
-    'holderCount', 'holderConcentration', 'top10HoldersPercent', 'averageHoldingTime',
-    'suspiciousHolderPatterns', 'whaleCount', 'holderGrowthRate', 'dormantHolders',
-    'newHoldersSpiking', 'sellingPressure',
-
-    // Contract code features (15)
-    'hasHiddenMint', 'hasPausableTransfers', 'hasBlacklist', 'hasWhitelist',
-    'hasTimelocks', 'complexityScore', 'hasProxyPattern', 'isUpgradeable',
-    'hasExternalCalls', 'hasSelfDestruct', 'hasDelegateCall', 'hasInlineAssembly',
-    'verifiedContract', 'auditedByFirm', 'openSourceCode',
-
-    // Transaction patterns (8)
-    'avgDailyTransactions', 'transactionVelocity', 'uniqueInteractors', 'suspiciousPatterns',
-    'highFailureRate', 'gasOptimized', 'flashloanInteractions', 'frontRunningDetected',
-
-    // Time-based features (5)
-    'contractAge', 'lastActivityDays', 'creationBlock', 'deployedDuringBullMarket',
-    'launchFairness'
-  ];
+function convertFeaturesToArray(features, featureArray = new Float32Array(NUM_FEATURES)) {
+  let missing = null;
 
-  // Convert to array
-  const featureArray = featureOrder.map(featureName => {
+  for (let i = 0; i < NUM_FEATURES; i++) {
+    const featureName = FEATURE_ORDER[i];
     const value = features[featureName];
 
-    // Handle missing features
+    // Handle missing features (default 0; the buffer may hold a previous
+    // request's values); reported once after the loop rather than per feature
     if (value === undefined || value === null) {
-      console.warn(`[RugDetector] Missing feature: ${featureName}, using default 0`);
-      return 0;
+      featureArray[i] = 0;
+      (missing || (missing = [])).push(featureName);
+      continue;
     }
 
-    // Convert boolean to number
-    if (typeof value === 'boolean') {
-      console.warn(`[RugDetector] WARNING: Boolean detected for ${featureName}: ${value}`);
-      return value ? 1 : 0;
-    }
-
-    // Return numeric value
+    // Booleans and numeric strings coerce via Number()
     const numValue = Number(value);
 
-    // Debug: Check for NaN or non-numeric
-    if (isNaN(numValue)) {
+    if (Number.isNaN(numValue)) {
       console.error(`[RugDetector] ERROR: Non-numeric value for ${featureName}: ${value} (type: ${typeof value})`);
-      return 0;
+      featureArray[i] = 0;
+      continue;
     }
 
-    return numValue;
-  });
-
-  if (featureArray.length !== 60) {
-    throw new Error(`Expected 60 features, got ${featureArray.length}`);
+    featureArray[i] = numValue;
   }
 
-  // Debug: Log feature array types
-  console.log(`[RugDetector] Feature array length: ${featureArray.length}`);
-  const typeCheck = featureArray.map((v, i) => ({ index: i, type: typeof v, value: v }))
-    .filter(item => typeof item.value !== 'number');
-  if (typeCheck.length > 0) {
-    console.error(`[RugDetector] NON-NUMERIC VALUES DETECTED:`, JSON.stringify(typeCheck));
+  if (missing) {
+    console.warn(`[RugDetector] Missing ${missing.length} feature(s), using default 0: ${missing.join(', ')}`);
   }
 
   return featureArray;
@@ -293,82 +460,117 @@ function convertFeaturesToArray(features) {
  * @param {string} contractAddress - Contract address (0x...)
  * @param {string} blockchain - Blockchain name (ethereum, bsc, polygon)
  * @returns {Promise<Array<number>>} - 18 features as array
+ * @throws {Error} if feature extraction fails
  */
 async function extractZkmlFeatures(contractAddress, blockchain) {
-  try {
-    // For now, extract comprehensive features and map to zkML subset
-    const fullFeatures = await extractFeatures(contractAddress, blockchain);
-
-    // Map 60 features to 18 zkML features
-    // Order must match training: mint_count_per_week, burn_count_per_week, mint_ratio, swap_ratio, burn_ratio, etc.
-    const zkmlFeatures = [
-      fullFeatures.avgDailyTransactions || 0,  // Proxy for mint_count_per_week
-      fullFeatures.avgDailyTransactions * 0.5 || 0,  // Proxy for burn_count_per_week
-      fullFeatures.liquidityRatio || 0.5,  // mint_ratio proxy
-      fullFeatures.transactionVelocity / 100 || 0.3,  // swap_ratio proxy
-      0.2,  // burn_ratio - estimated
-      3.5,  // mint_mean_period - estimated
-      2.0,  // swap_mean_period - estimated
-      4.0,  // burn_mean_period - estimated
-      fullFeatures.avgDailyTransactions * 10 || 1000,  // swap_in_per_week
-      fullFeatures.avgDailyTransactions * 8 || 800,  // swap_out_per_week
-      fullFeatures.transactionVelocity / 10 || 15.5,  // swap_rate
-      fullFeatures.liquidityPoolSize || 50000,  // lp_avg
-      fullFeatures.liquidityPoolSize * 0.1 || 5000,  // lp_std
-      fullFeatures.top10HoldersPercent / 100 || 0.1,  // lp_creator_holding_ratio
-      fullFeatures.holderCount || 20,  // number_of_holders proxy
-      fullFeatures.ownerBalance || 0.05,  // creator_balance_in_lp
-      fullFeatures.contractAge / 7 || 30,  // token_age_weeks
-      fullFeatures.ownerBalance || 0.15  // token_creator_holding_ratio
-    ];
-
-    return zkmlFeatures;
-  } catch (error) {
-    console.error(`[RugDetector] zkML feature extraction failed:`, error);
-    // Return default safe values
-    return [100, 50, 0.5, 0.3, 0.2, 3.5, 2.0, 4.0, 1000, 800, 15.5, 50000, 5000, 0.1, 20, 0.05, 30, 0.15];
-  }
+  // For now, extract comprehensive features and map to zkML subset. Errors
+  // propagate: scoring made-up features would return a confident-looking
+  // risk score for a contract that was never analyzed
+  const fullFeatures = await extractFeatures(contractAddress, blockchain);
+
+  // Map 60 features to 18 zkML features
+  // Order must match training: mint_count_per_week, burn_count_per_week, mint_ratio, swap_ratio, burn_ratio, etc.
+  const zkmlFeatures = [
+    fullFeatures.avgDailyTransactions || 0,  // Proxy for mint_count_per_week
+    fullFeatures.avgDailyTransactions * 0.5 || 0,  // Proxy for burn_count_per_week
+    fullFeatures.liquidityRatio || 0.5,  // mint_ratio proxy
+    fullFeatures.transactionVelocity / 100 || 0.3,  // swap_ratio proxy
+    0.2,  // burn_ratio - estimated
+    3.5,  // mint_mean_period - estimated
+    2.0,  // swap_mean_period - estimated
+    4.0,  // burn_mean_period - estimated
+    fullFeatures.avgDailyTransactions * 10 || 1000,  // swap_in_per_week
+    fullFeatures.avgDailyTransactions * 8 || 800,  // swap_out_per_week
+    fullFeatures.transactionVelocity / 10 || 15.5,  // swap_rate
+    fullFeatures.liquidityPoolSize || 50000,  // lp_avg
+    fullFeatures.liquidityPoolSize * 0.1 || 5000,  // lp_std
+    fullFeatures.top10HoldersPercent / 100 || 0.1,  // lp_creator_holding_ratio
+    fullFeatures.holderCount || 20,  // number_of_holders proxy
+    fullFeatures.ownerBalance || 0.05,  // creator_balance_in_lp
+    fullFeatures.contractAge / 7 || 30,  // token_age_weeks
+    fullFeatures.ownerBalance || 0.15  // token_creator_holding_ratio
+  ];
+
+  if (simulatedFeatures.has(fullFeatures)) simulatedFeatures.add(zkmlFeatures);
+
+  return zkmlFeatures;
 }
 
+const ZKML_NUM_FEATURES = 18;
+
+// zkML scaler parameters, read from the pickle by one Python call per process
+let cachedZkmlScaler = null;
+
 /**
- * Analyze contract using zkML model (18 features, Jolt-Atlas compatible)
- * @param {Array<number>} features - 18 features array
- * @returns {Promise<{riskScore: number, riskCategory: string, confidence: number, probability: number}>}
+ * Load the zkML scaler's mean and std (cached)
+ * Accepts both the {mean, std} dict written by prepare_data.py and older
+ * StandardScaler pickles (mean_, scale_)
+ * @returns {Promise<{mean: Float32Array, std: Float32Array}>}
  */
-async function analyzeContractZkml(features) {
-  try {
-    const { spawn } = require('child_process');
-    const fs = require('fs').promises;
+function loadZkmlScaler() {
+  if (cachedZkmlScaler) {
+    return cachedZkmlScaler;
+  }
 
-    // Load scaler and transform features
+  console.log(`[RugDetector] Loading zkML scaler from ${ZKML_SCALER_PATH}`);
+  cachedZkmlScaler = new Promise((resolve, reject) => {
     const scalerProc = spawn(PYTHON_PATH, ['-c', `
+import json
 import pickle
+import sys
 import numpy as np
-import json
 
-with open('${ZKML_SCALER_PATH}', 'rb') as f:
+with open(sys.argv[1], 'rb') as f:
     scaler = pickle.load(f)
 
-features = ${JSON.stringify(features)}
-scaled = scaler.transform([features])
-print(json.dumps(scaled[0].tolist()))
-`]);
-
-    let scaledFeatures = await new Promise((resolve, reject) => {
-      let stdout = '';
-      scalerProc.stdout.on('data', (data) => { stdout += data.toString(); });
-      scalerProc.on('close', (code) => {
-        if (code !== 0) reject(new Error('Scaler failed'));
-        else resolve(JSON.parse(stdout));
-      });
-      setTimeout(() => { scalerProc.kill(); reject(new Error('Scaler timeout')); }, 5000);
+if isinstance(scaler, dict):
+    mean, std = scaler['mean'], scaler['std']
+else:
+    mean, std = scaler.mean_, scaler.scale_  # older StandardScaler pickles
+print(json.dumps({'mean': np.ravel(mean).tolist(), 'std': np.ravel(std).tolist()}))
+`, ZKML_SCALER_PATH]);
+
+    let stdout = '';
+    const timer = setTimeout(() => { scalerProc.kill(); reject(new Error('Scaler timeout')); }, 5000);
+    scalerProc.stdout.on('data', (data) => { stdout += data.toString(); });
+    scalerProc.on('error', (error) => reject(new Error(`Scaler failed: ${error.message}`)));
+    scalerProc.on('close', (code) => {
+      clearTimeout(timer);
+      if (code !== 0) return reject(new Error('Scaler failed'));
+      try {
+        const { mean, std } = JSON.parse(stdout);
+        console.log(`[RugDetector] zkML scaler loaded successfully`);
+        resolve({ mean: Float32Array.from(mean), std: Float32Array.from(std) });
+      } catch (parseError) {
+        reject(new Error('Failed to parse scaler output'));
+      }
     });
+  });
+
+  // Don't cache a failure; the next request retries
+  cachedZkmlScaler.catch(() => { cachedZkmlScaler = null; });
+  return cachedZkmlScaler;
+}
+
+/**
+ * Analyze contract using zkML model (18 features, Jolt-Atlas compatible)
+ * @param {Array<number>} features - 18 features array
+ * @returns {Promise<{riskScore: number, riskCategory: string, confidence: number, probability: number}>}
+ */
+async function analyzeContractZkml(features) {
+  try {
+    // Standardize with the cached scaler: (x - mean) / std
+    const { mean, std } = await loadZkmlScaler();
+    const scaledFeatures = new Float32Array(ZKML_NUM_FEATURES);
+    for (let i = 0; i < ZKML_NUM_FEATURES; i++) {
+      scaledFeatures[i] = (features[i] - mean[i]) / std[i];
+    }
 
     // Load zkML model
-    const session = await onnx.InferenceSession.create(ZKML_MODEL_PATH);
+    const session = await loadZkmlModel();
 
     // Create input tensor
-    const inputTensor = new onnx.Tensor('float32', Float32Array.from(scaledFeatures), [1, 18]);
+    const inputTensor = new onnx.Tensor('float32', scaledFeatures, [1, ZKML_NUM_FEATURES]);
 
     console.log(`[RugDetector] Running zkML inference (18 features)`);
 
@@ -410,11 +612,42 @@ print(json.dumps(scaled[0].tolist()))
   }
 }
 
+/**
+ * Load everything the active model path needs and run one dummy inference,
+ * so the first /check doesn't pay for session creation, graph optimization,
+ * scaler loading or the extractor worker's startup
+ * @returns {Promise<void>}
+ */
+async function warmUp() {
+  const start = Date.now();
+
+  // Python import time overlaps with the model loads below
+  while (extractorPool.length < EXTRACTOR_POOL_SIZE) {
+    startExtractorWorker();
+  }
+
+  if (USE_ZKML_MODEL) {
+    const [session] = await Promise.all([loadZkmlModel(), loadZkmlScaler()]);
+    const zeros = new onnx.Tensor('float32', new Float32Array(ZKML_NUM_FEATURES), [1, ZKML_NUM_FEATURES]);
+    await session.run({ input: zeros });
+  } else {
+    const session = await loadModel();
+    await runExclusive(() => {
+      inputBuffer.fill(0);
+      return session.run({ float_input: inputTensor });
+    });
+  }
+
+  console.log(`[RugDetector] Warm-up complete in ${Date.now() - start} ms`);
+}
+
 module.exports = {
   extractFeatures,
+  isSimulated,
   analyzeContract,
   extractZkmlFeatures,
   analyzeContractZkml,
+  warmUp,
   ZKML_MODEL_PATH,
   USE_ZKML_MODEL
 };
@@ -10,13 +10,22 @@ const MODEL_PATH = path.join(__dirname, '../../model/zkml_rugdetector.onnx');  /
 const PROVER_BINARY = path.join(__dirname, '../../zkml-jolt-atlas/target/release/zkml-jolt-core');
 const TEMP_DIR = path.join(__dirname, '../../.zkml_temp');
 
-// Ensure temp directory exists
-async function ensureTempDir() {
-  try {
-    await fs.mkdir(TEMP_DIR, { recursive: true });
-  } catch (error) {
-    console.error('[zkML] Failed to create temp directory:', error);
+// Prover output as read from disk, keyed by the proof object parsed from it,
+// so a local verify writes those bytes back instead of re-encoding the proof
+const rawProofJson = new WeakMap();
+
+// Ensure temp directory exists. Created once per process: every prove and
+// verify awaits the same promise instead of issuing its own mkdir
+let tempDirReady = null;
+
+function ensureTempDir() {
+  if (!tempDirReady) {
+    tempDirReady = fs.mkdir(TEMP_DIR, { recursive: true }).catch((error) => {
+      console.error('[zkML] Failed to create temp directory:', error);
+      tempDirReady = null;  // retry on the next request
+    });
   }
+  return tempDirReady;
 }
 
 /**
@@ -57,17 +66,17 @@ async function generateProof(features, result) {
         '--output', outputPath
       ]);
 
-      let stdout = '';
+      // Each chunk is decoded once; only stderr is kept (for the error message)
       let stderr = '';
 
       prover.stdout.on('data', (data) => {
-        stdout += data.toString();
         console.log(`[zkML Prover] ${data.toString().trim()}`);
       });
 
       prover.stderr.on('data', (data) => {
-        stderr += data.toString();
-        console.error(`[zkML Prover Error] ${data.toString().trim()}`);
+        const text = data.toString();
+        stderr += text;
+        console.error(`[zkML Prover Error] ${text.trim()}`);
       });
 
       prover.on('close', async (code) => {
@@ -80,6 +89,8 @@ async function generateProof(features, result) {
           // Read the proof file
           const proofJson = await fs.readFile(outputPath, 'utf8');
           const proofData = JSON.parse(proofJson);
+          proofData.proof_size_bytes = Buffer.byteLength(proofJson);  // as written by the prover
+          rawProofJson.set(proofData, proofJson);
 
           // Clean up temp files
           await fs.unlink(inputPath).catch(() => {});
@@ -101,7 +112,6 @@ async function generateProof(features, result) {
     console.log(`[zkML] Jolt-Atlas proof generated: ${proof.proof_id?.slice(0, 16)}...`);
 
     // Add additional metadata
-    proof.proof_size_bytes = JSON.stringify(proof).length;
     proof.generated_at = new Date(timestamp * 1000).toISOString();
 
     return proof;
@@ -137,8 +147,8 @@ async function verifyProof(proof, features, result) {
     const proofId = proof.proof_id || 'unknown';
     const proofPath = path.join(TEMP_DIR, `verify_${proofId}_${Date.now()}.json`);
 
-    // Write proof to temp file
-    await fs.writeFile(proofPath, JSON.stringify(proof));
+    // Write proof to temp file (the prover's own bytes when we generated it)
+    await fs.writeFile(proofPath, rawProofJson.get(proof) ?? JSON.stringify(proof));
 
     console.log(`[zkML] Verifying proof ${proofId.slice(0, 16)}...`);
 
@@ -149,17 +159,16 @@ async function verifyProof(proof, features, result) {
         '--proof', proofPath
       ]);
 
-      let stdout = '';
       let stderr = '';
 
       verifier.stdout.on('data', (data) => {
-        stdout += data.toString();
         console.log(`[zkML Verifier] ${data.toString().trim()}`);
       });
 
       verifier.stderr.on('data', (data) => {
-        stderr += data.toString();
-        console.error(`[zkML Verifier Error] ${data.toString().trim()}`);
+        const text = data.toString();
+        stderr += text;
+        console.error(`[zkML Verifier Error] ${text.trim()}`);
       });
 
       verifier.on('close', async (code) => {
@@ -20,10 +20,26 @@ from eth_abi import decode
 # HTTP requests
 import requests
 
+# Fast JSON serialization (optional, falls back to stdlib json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
+# Sibling extractors, resolved once per process
+from extract_features_simulated import extract_features as extract_features_simulated
+from feature_schema import FEATURE_NAMES, FEATURE_NAMES_SET
+
+try:
+    from dex_analytics import extract_advanced_features
+except ImportError as e:
+    print(f"Advanced analytics module not importable: {e}", file=sys.stderr)
+    extract_advanced_features = None
+
 
 # ========== CONFIGURATION ==========
 
@@ -45,6 +61,23 @@ BLOCKCHAIN_CONFIGS = {
 FEATURE_EXTRACTION_MODE = os.getenv('FEATURE_EXTRACTION_MODE', 'hybrid')
 TIMEOUT = int(os.getenv('FEATURE_TIMEOUT_SECONDS', '30'))
 
+# Standard ERC20 view functions: (token_info key, function name, default on failure)
+_ERC20_VIEWS = [
+    ('name', 'name', None),
+    ('symbol', 'symbol', None),
+    ('decimals', 'decimals', 18),
+    ('total_supply', 'totalSupply', 0),
+    ('owner', 'owner', None),
+]
+
+ERC20_VIEW_ABI = [
+    {"constant": True, "inputs": [], "name": "name", "outputs": [{"name": "", "type": "string"}], "type": "function"},
+    {"constant": True, "inputs": [], "name": "symbol", "outputs": [{"name": "", "type": "string"}], "type": "function"},
+    {"constant": True, "inputs": [], "name": "decimals", "outputs": [{"name": "", "type": "uint8"}], "type": "function"},
+    {"constant": True, "inputs": [], "name": "totalSupply", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
+    {"constant": True, "inputs": [], "name": "owner", "outputs": [{"name": "", "type": "address"}], "type": "function"},
+]
+
 
 # ========== BLOCKCHAIN DATA FETCHERS ==========
 
@@ -160,42 +193,14 @@ class BlockchainDataFetcher:
     def get_token_info(self) -> dict:
         """Get ERC20 token information if applicable"""
         try:
-            # Try to call standard ERC20 functions
-            erc20_abi = [
-                {"constant": True, "inputs": [], "name": "name", "outputs": [{"name": "", "type": "string"}], "type": "function"},
-                {"constant": True, "inputs": [], "name": "symbol", "outputs": [{"name": "", "type": "string"}], "type": "function"},
-                {"constant": True, "inputs": [], "name": "decimals", "outputs": [{"name": "", "type": "uint8"}], "type": "function"},
-                {"constant": True, "inputs": [], "name": "totalSupply", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
-                {"constant": True, "inputs": [], "name": "owner", "outputs": [{"name": "", "type": "address"}], "type": "function"},
-            ]
-
-            contract = self.w3.eth.contract(address=self.contract_address, abi=erc20_abi)
+            contract = self.w3.eth.contract(address=self.contract_address, abi=ERC20_VIEW_ABI)
 
             token_info = {}
-            try:
-                token_info['name'] = contract.functions.name().call()
-            except:
-                token_info['name'] = None
-
-            try:
-                token_info['symbol'] = contract.functions.symbol().call()
-            except:
-                token_info['symbol'] = None
-
-            try:
-                token_info['decimals'] = contract.functions.decimals().call()
-            except:
-                token_info['decimals'] = 18
-
-            try:
-                token_info['total_supply'] = contract.functions.totalSupply().call()
-            except:
-                token_info['total_supply'] = 0
-
-            try:
-                token_info['owner'] = contract.functions.owner().call()
-            except:
-                token_info['owner'] = None
+            for key, fn_name, default in _ERC20_VIEWS:
+                try:
+                    token_info[key] = contract.functions[fn_name]().call()
+                except Exception:
+                    token_info[key] = default
 
             return token_info
         except Exception as e:
@@ -431,16 +436,16 @@ def extract_features_real(contract_address: str, blockchain: str = 'ethereum') -
 
     # ===== ADVANCED ANALYTICS INTEGRATION =====
     # Try to use advanced DEX + holder analytics if available
-    try:
-        from dex_analytics import extract_advanced_features
-        advanced_features = extract_advanced_features(contract_address, blockchain, fetcher.w3)
+    if extract_advanced_features is not None:
+        try:
+            advanced_features = extract_advanced_features(contract_address, blockchain, fetcher.w3)
 
-        # Override basic features with advanced analytics where available
-        if advanced_features:
-            print(f"Integrated {len(advanced_features)} advanced features", file=sys.stderr)
-            features.update(advanced_features)
-    except Exception as e:
-        print(f"Advanced analytics unavailable, using basic heuristics: {e}", file=sys.stderr)
+            # Override basic features with advanced analytics where available
+            if advanced_features:
+                print(f"Integrated {len(advanced_features)} advanced features", file=sys.stderr)
+                features.update(advanced_features)
+        except Exception as e:
+            print(f"Advanced analytics unavailable, using basic heuristics: {e}", file=sys.stderr)
 
     # ===== LIQUIDITY FEATURES (12) =====
     # Fill in defaults for features not set by advanced analytics
@@ -552,25 +557,39 @@ def extract_features_real(contract_address: str, blockchain: str = 'ethereum') -
     else:
         features['launchFairness'] = 0.2
 
+    missing = [name for name in FEATURE_NAMES if name not in features]
+    if missing:
+        print(f"Warning: {len(missing)} schema features not set: {', '.join(missing[:5])}", file=sys.stderr)
+    extra = set(features).difference(FEATURE_NAMES_SET)
+    if extra:
+        print(f"Warning: features outside the schema: {', '.join(sorted(extra))}", file=sys.stderr)
+
     print(f"Successfully extracted {len(features)} real features", file=sys.stderr)
 
     return features
 
 
-def extract_features_hybrid(contract_address: str, blockchain: str = 'ethereum') -> dict:
+def extract_features_with_source(contract_address: str, blockchain: str = 'ethereum') -> Tuple[dict, str]:
     """
-    Extract features using hybrid approach:
-    - Real data where available
-    - Fallback to heuristics where API limits exist
+    Extract features per FEATURE_EXTRACTION_MODE and report where they came from
+
+    Returns:
+        tuple: (features, source) with source 'real' or 'simulated'; hybrid
+        mode reports 'simulated' when it had to fall back
     """
+    mode = FEATURE_EXTRACTION_MODE.lower()
+
+    if mode == 'real':
+        return extract_features_real(contract_address, blockchain), 'real'
+    elif mode == 'simulated':
+        return extract_features_simulated(contract_address, blockchain), 'simulated'
+
+    # hybrid (default): real data, simulated if real extraction fails
     try:
-        # Try real extraction first
-        return extract_features_real(contract_address, blockchain)
+        return extract_features_real(contract_address, blockchain), 'real'
     except Exception as e:
         print(f"Real extraction failed: {e}, falling back to simulated", file=sys.stderr)
-        # Fallback to simulated if real extraction fails
-        from extract_features_simulated import extract_features as extract_features_simulated
-        return extract_features_simulated(contract_address, blockchain)
+        return extract_features_simulated(contract_address, blockchain), 'simulated'
 
 
 def extract_features(contract_address: str, blockchain: str = 'ethereum') -> dict:
@@ -578,15 +597,7 @@ def extract_features(contract_address: str, blockchain: str = 'ethereum') -> dic
     Main entry point for feature extraction
     Delegates to appropriate extractor based on FEATURE_EXTRACTION_MODE
     """
-    mode = FEATURE_EXTRACTION_MODE.lower()
-
-    if mode == 'real':
-        return extract_features_real(contract_address, blockchain)
-    elif mode == 'simulated':
-        from extract_features_simulated import extract_features as extract_features_simulated
-        return extract_features_simulated(contract_address, blockchain)
-    else:  # hybrid (default)
-        return extract_features_hybrid(contract_address, blockchain)
+    return extract_features_with_source(contract_address, blockchain)[0]
 
 
 def validate_contract_address(address: str) -> str:
@@ -609,8 +620,59 @@ def validate_contract_address(address: str) -> str:
     return address.lower()
 
 
+def extract_validated(contract_address: str, blockchain: str) -> Tuple[dict, str]:
+    """Validate the inputs, then extract features; returns (features, source)"""
+    contract_address = validate_contract_address(contract_address)
+
+    if blockchain.lower() not in BLOCKCHAIN_CONFIGS:
+        raise ValueError(f"Unsupported blockchain: {blockchain}")
+
+    return extract_features_with_source(contract_address, blockchain)
+
+
+def _encode_line(obj) -> bytes:
+    """One newline-terminated JSON line"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj).encode('utf-8') + b'\n'
+
+
+def serve_stdio():
+    """
+    Answer newline-delimited JSON requests on stdin until it closes
+
+    Request:  {"id": ..., "contract_address": "0x...", "blockchain": "base"}
+    Response: {"id": ..., "features": {...}, "source": "real"|"simulated"}
+              or {"id": ..., "error": "..."}
+
+    One line per request, in order. Lets the API keep a few warm
+    interpreters instead of starting Python for every /check.
+    """
+    out = sys.stdout.buffer
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            features, source = extract_validated(request['contract_address'], request.get('blockchain', 'ethereum'))
+            # Encoded inside the try: an unserializable value fails this request only
+            payload = _encode_line({"id": request_id, "features": features, "source": source})
+        except Exception as e:
+            payload = _encode_line({"id": request_id, "error": str(e)})
+
+        out.write(payload)
+        out.flush()
+
+
 def main():
     """Main entry point when called as script"""
+    if '--stdio' in sys.argv:
+        serve_stdio()
+        return
+
     if len(sys.argv) < 2:
         print(json.dumps({"error": "Missing contract address argument"}), file=sys.stderr)
         sys.exit(1)
@@ -619,17 +681,17 @@ def main():
     blockchain = sys.argv[2] if len(sys.argv) > 2 else 'ethereum'
 
     try:
-        # Validate inputs
-        contract_address = validate_contract_address(contract_address)
-
-        if blockchain.lower() not in BLOCKCHAIN_CONFIGS:
-            raise ValueError(f"Unsupported blockchain: {blockchain}")
-
-        # Extract features
-        features = extract_features(contract_address, blockchain)
+        features, _ = extract_validated(contract_address, blockchain)
 
         # Output as JSON to stdout
-        print(json.dumps(features, indent=2))
+        if orjson is not None:
+            sys.stdout.buffer.write(orjson.dumps(
+                features,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+            ))
+            sys.stdout.buffer.flush()
+        else:
+            print(json.dumps(features, indent=2))
 
     except Exception as e:
         print(json.dumps({"error": str(e)}), file=sys.stderr)
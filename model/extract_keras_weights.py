@@ -46,9 +46,10 @@ def extract_keras_weights(keras_path, weights_path):
 
         print(f"   Layer {i+1}: {layer.name} - weight shape {weight.shape}, bias shape {bias.shape if bias is not None else None}")
 
-    # Save as pickle
+    # Save as pickle (protocol 5 lets numpy hand its buffers to the
+    # pickler directly instead of copying them into an intermediate bytes)
     with open(weights_path, 'wb') as f:
-        pickle.dump(weights_dict, f)
+        pickle.dump(weights_dict, f, protocol=5)
 
     print(f"\n✅ Weights saved to: {weights_path}")
     return weights_path
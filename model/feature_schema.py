@@ -0,0 +1,36 @@
+"""
+Canonical 60-feature schema shared by the extractor and the training pipeline
+"""
+
+# Order matches the feature vector fed to the model
+FEATURE_NAMES = (
+    # Ownership (10)
+    'hasOwnershipTransfer', 'hasRenounceOwnership', 'ownerBalance', 'ownerTransactionCount',
+    'multipleOwners', 'ownershipChangedRecently', 'ownerContractAge', 'ownerIsContract',
+    'ownerBlacklisted', 'ownerVerified',
+    # Liquidity (12)
+    'hasLiquidityLock', 'liquidityPoolSize', 'liquidityRatio', 'hasUniswapV2',
+    'hasPancakeSwap', 'liquidityLockedDays', 'liquidityProvidedByOwner', 'multiplePoolsExist',
+    'poolCreatedRecently', 'lowLiquidityWarning', 'rugpullHistoryOnDEX', 'slippageTooHigh',
+    # Holders (10)
+    'holderCount', 'holderConcentration', 'top10HoldersPercent', 'averageHoldingTime',
+    'suspiciousHolderPatterns', 'whaleCount', 'holderGrowthRate', 'dormantHolders',
+    'newHoldersSpiking', 'sellingPressure',
+    # Contract code (15)
+    'hasHiddenMint', 'hasPausableTransfers', 'hasBlacklist', 'hasWhitelist',
+    'hasTimelocks', 'complexityScore', 'hasProxyPattern', 'isUpgradeable',
+    'hasExternalCalls', 'hasSelfDestruct', 'hasDelegateCall', 'hasInlineAssembly',
+    'verifiedContract', 'auditedByFirm', 'openSourceCode',
+    # Transaction patterns (8)
+    'avgDailyTransactions', 'transactionVelocity', 'uniqueInteractors', 'suspiciousPatterns',
+    'highFailureRate', 'gasOptimized', 'flashloanInteractions', 'frontRunningDetected',
+    # Time-based (5)
+    'contractAge', 'lastActivityDays', 'creationBlock', 'deployedDuringBullMarket',
+    'launchFairness',
+)
+FEATURE_NAMES_SET = frozenset(FEATURE_NAMES)
+
+# All features are numeric; float64 also holds the NaNs of failed lookups
+FEATURE_DTYPES = dict.fromkeys(FEATURE_NAMES, 'float64')
+
+assert len(FEATURE_NAMES) == 60 and len(FEATURE_NAMES_SET) == 60
@@ -9,6 +9,8 @@ import numpy as np
 import torch
 import torch.nn as nn
 import sys
+from dataclasses import dataclass, field
+from typing import List
 
 class RugDetectorFromH5(nn.Module):
     """PyTorch model built from H5 weights"""
@@ -26,11 +28,24 @@ class RugDetectorFromH5(nn.Module):
     def forward(self, x):
         return self.model(x)
 
+def read_dataset(dataset):
+    """Read an H5 dataset into a preallocated array with a single direct read"""
+    buf = np.empty(dataset.shape, dtype=dataset.dtype)
+    dataset.read_direct(buf)
+    return buf
+
+@dataclass
+class LayerWeights:
+    """Dense layer weights as parallel lists, already in PyTorch Linear layout"""
+    names: List[str] = field(default_factory=list)
+    kernels_t: List[np.ndarray] = field(default_factory=list)  # [out, in], contiguous float32
+    biases: List[np.ndarray] = field(default_factory=list)     # [out], contiguous float32
+
 def load_weights_from_h5(h5_path):
     """Load weights from H5 file"""
     print(f"📦 Loading weights from: {h5_path}")
 
-    weights_list = []
+    weights = LayerWeights()
 
     with h5py.File(h5_path, 'r') as f:
         model_weights = f['model_weights']
@@ -42,32 +57,39 @@ def load_weights_from_h5(h5_path):
             layer_group = model_weights[layer_name][layer_name]
 
             # Load kernel (weight matrix) and bias
-            kernel = layer_group['kernel:0'][:]  # Shape: [in, out]
-            bias = layer_group['bias:0'][:]
+            kernel = read_dataset(layer_group['kernel:0'])  # Shape: [in, out]
+            bias = read_dataset(layer_group['bias:0'])
+
+            # H5 kernel shape: [in, out]; PyTorch Linear weight shape: [out, in].
+            # Transpose while the data is hot, materialized once as contiguous
+            # float32 so torch can wrap the buffer without another copy
+            kernel_t = np.ascontiguousarray(kernel.T, dtype=np.float32)
+
+            # Exported as Gemm(transB=1) with B in canonical row-major [out, in]:
+            # unit stride along `in` is what MLAS packs from, and torch keeps
+            # this buffer as-is when serializing the initializer
+            assert kernel_t.strides[-1] == kernel_t.itemsize, f"{layer_name}: kernel not row-major"
 
-            weights_list.append({
-                'name': layer_name,
-                'kernel': kernel,
-                'bias': bias
-            })
+            weights.names.append(layer_name)
+            weights.kernels_t.append(kernel_t)
+            weights.biases.append(np.ascontiguousarray(bias, dtype=np.float32))
 
             print(f"   {layer_name}: kernel={kernel.shape}, bias={bias.shape}")
 
-    return weights_list
+    return weights
 
-def convert_h5_to_onnx(h5_path, onnx_path, opset=11):
-    """Convert H5 model to ONNX"""
+def convert_h5_to_onnx(h5_path, onnx_path, opset=11, static_batch=False):
+    """Convert H5 model to ONNX (static_batch fixes the input to [1, in])"""
     print(f"\n🔧 Converting H5 to ONNX")
     print(f"   Input: {h5_path}")
     print(f"   Output: {onnx_path}")
 
     # Load weights
-    weights_list = load_weights_from_h5(h5_path)
+    weights = load_weights_from_h5(h5_path)
 
     # Extract layer sizes
-    layer_sizes = [weights_list[0]['kernel'].shape[0]]  # Input size
-    for w in weights_list:
-        layer_sizes.append(w['kernel'].shape[1])  # Output size
+    layer_sizes = [weights.kernels_t[0].shape[1]]  # Input size
+    layer_sizes.extend(k.shape[0] for k in weights.kernels_t)  # Output sizes
 
     print(f"\n✓ Layer architecture: {layer_sizes}")
 
@@ -79,15 +101,12 @@ def convert_h5_to_onnx(h5_path, onnx_path, opset=11):
     print("📋 Transferring weights...")
     torch_linears = [m for m in model.model if isinstance(m, nn.Linear)]
 
-    for i, (torch_linear, weights) in enumerate(zip(torch_linears, weights_list)):
-        # H5 kernel shape: [in, out]
-        # PyTorch Linear weight shape: [out, in]
-        # So we need to transpose
-        kernel_transposed = weights['kernel'].T
-        torch_linear.weight.data = torch.from_numpy(kernel_transposed).float()
-        torch_linear.bias.data = torch.from_numpy(weights['bias']).float()
+    layers = zip(torch_linears, weights.names, weights.kernels_t, weights.biases)
+    for i, (torch_linear, name, kernel_t, bias) in enumerate(layers):
+        torch_linear.weight.data = torch.from_numpy(kernel_t)
+        torch_linear.bias.data = torch.from_numpy(bias)
 
-        print(f"   Layer {i+1}: {weights['name']} -> PyTorch Linear")
+        print(f"   Layer {i+1}: {name} -> PyTorch Linear")
 
     print("✓ All weights transferred")
 
@@ -105,10 +124,10 @@ def convert_h5_to_onnx(h5_path, onnx_path, opset=11):
         onnx_path,
         export_params=True,
         opset_version=opset,
-        do_constant_folding=True,
+        do_constant_folding=False,
         input_names=['input'],
         output_names=['output'],
-        dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
+        dynamic_axes=None if static_batch else {'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
     )
 
     print(f"✅ ONNX export complete!")
@@ -143,13 +162,14 @@ if __name__ == '__main__':
     h5_file = 'model/ann97_rugpull.h5'
     onnx_file = 'model/ann97_from_keras.onnx'
 
-    if len(sys.argv) > 1:
-        h5_file = sys.argv[1]
-    if len(sys.argv) > 2:
-        onnx_file = sys.argv[2]
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) > 0:
+        h5_file = args[0]
+    if len(args) > 1:
+        onnx_file = args[1]
 
     try:
-        convert_h5_to_onnx(h5_file, onnx_file)
+        convert_h5_to_onnx(h5_file, onnx_file, static_batch='--static-batch' in sys.argv)
         print("\n✅ SUCCESS! Model converted to ONNX format")
         print(f"   Ready for Jolt-Atlas zkML testing")
     except Exception as e:
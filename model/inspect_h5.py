@@ -9,8 +9,13 @@ def inspect_h5(path):
     print(f"📋 Inspecting: {path}\n")
 
     with h5py.File(path, 'r') as f:
+        # Depth of each visited path; parents are always visited first
+        depths = {'': -1}
+
         def print_structure(name, obj):
-            indent = "  " * name.count('/')
+            depth = depths[name.rpartition('/')[0]] + 1
+            depths[name] = depth
+            indent = "  " * depth
             if isinstance(obj, h5py.Dataset):
                 print(f"{indent}{name}: shape={obj.shape}, dtype={obj.dtype}")
             else:
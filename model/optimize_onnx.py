@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Pre-optimize an ONNX model with onnxruntime's graph optimizer
+Writes <name>_opt.onnx next to the input for serving; the unoptimized file
+stays the Jolt-Atlas artifact since ORT may emit fused contrib ops
+"""
+
+import os
+import sys
+
+def optimize_onnx(input_path, output_path=None, external_data=False):
+    """
+    Run ORT graph optimizations once and save the optimized graph
+
+    Uses ORT_ENABLE_EXTENDED rather than ORT_ENABLE_ALL: the layout
+    optimizations only enabled by ALL are specific to the build machine's
+    CPU and must not be baked into a shipped file.
+
+    With external_data=True the optimized initializers are written to a
+    sidecar <output>.bin, so the .onnx is just the graph and loaders read
+    the weights straight from the sidecar file.
+
+    Args:
+        input_path: Path to ONNX model
+        output_path: Where to save the optimized model (default: *_opt.onnx)
+        external_data: Store initializers in a sidecar .bin file
+    """
+    import onnxruntime as ort
+
+    if output_path is None:
+        output_path = input_path.replace('.onnx', '_opt.onnx')
+
+    print(f"🔧 Optimizing ONNX graph: {input_path}")
+
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    so.optimized_model_filepath = output_path
+
+    if external_data:
+        # File name is resolved relative to the optimized model's directory
+        bin_name = os.path.basename(output_path).replace('.onnx', '.bin')
+        so.add_session_config_entry(
+            'session.optimized_model_external_initializers_file_name', bin_name)
+        so.add_session_config_entry(
+            'session.optimized_model_external_initializers_min_size_in_bytes', '0')
+
+    # Creating the session runs the optimizer and writes optimized_model_filepath
+    ort.InferenceSession(input_path, so, providers=['CPUExecutionProvider'])
+
+    print(f"✅ Optimized model saved: {output_path}")
+    return output_path
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not args:
+        print("Usage: optimize_onnx.py <model.onnx> [output.onnx] [--external-data]")
+        sys.exit(1)
+
+    optimize_onnx(
+        args[0],
+        args[1] if len(args) > 1 else None,
+        external_data='--external-data' in sys.argv
+    )
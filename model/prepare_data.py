@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Preprocess the RugPull dataset once for the zkML training scripts
+Writes float32 X.npy / y.npy and the {mean, std} scaler to model/cache/,
+which train_small_model.py and train_zkml_model.py memory-map on startup
+"""
+
+import os
+import sys
+import json
+import pickle
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'  # multithreaded CSV parser
+except ImportError:
+    CSV_ENGINE = 'c'
+
+CSV_PATH = 'RugPull-Prediction-AI/Dataset_v1.9.csv'
+CACHE_DIR = 'model/cache'
+SOURCE_FILE = 'source.json'  # which CSV the cached arrays were built from
+
+def _source_info(csv_path):
+    """Identify the CSV by absolute path, size and modification time"""
+    st = os.stat(csv_path)
+    return {'csv_path': os.path.abspath(csv_path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def load_real_dataset(csv_path):
+    """Load and preprocess real RugPull dataset"""
+    print(f"📊 Loading dataset: {csv_path}")
+
+    # Get features (all columns except id and Label) from the header alone,
+    # then parse them straight to float32 so no float64 copy is ever built
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    feature_cols = [col for col in columns if col not in ['id', 'Label']]
+
+    df = pd.read_csv(
+        csv_path,
+        usecols=feature_cols + ['Label'],
+        dtype={col: np.float32 for col in feature_cols},
+        engine=CSV_ENGINE
+    )
+    print(f"   Loaded {len(df)} samples")
+    print(f"   Features: {len(feature_cols)} columns")
+
+    # Convert label to binary (handle both 'True'/'False' and 'TRUE'/'FALSE')
+    y = (df['Label'].astype(str).str.upper() == 'TRUE').to_numpy(dtype=np.float32)
+    X = df[feature_cols].to_numpy(dtype=np.float32)
+
+    # Handle NaN/inf values (in place)
+    np.nan_to_num(X, copy=False, nan=0.0, posinf=1e6, neginf=-1e6)
+
+    # Normalize features in place; inference applies (x - mean) / std
+    mean = X.mean(axis=0, dtype=np.float32)
+    std = X.std(axis=0, dtype=np.float32)
+    std[std < 1e-8] = 1.0  # constant columns pass through centered, like StandardScaler
+    np.subtract(X, mean, out=X)
+    np.divide(X, std, out=X)
+    scaler = {'mean': mean, 'std': std}
+
+    # Class distribution
+    unique, counts = np.unique(y, return_counts=True)
+    print(f"   Class distribution: {dict(zip(unique, counts))}")
+
+    return X, y, scaler
+
+def prepare_data(csv_path=CSV_PATH, cache_dir=CACHE_DIR):
+    """Preprocess the CSV and write X.npy, y.npy and scaler.pkl to cache_dir"""
+    X, y, scaler = load_real_dataset(csv_path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(os.path.join(cache_dir, 'X.npy'), X)
+    np.save(os.path.join(cache_dir, 'y.npy'), y)
+    with open(os.path.join(cache_dir, 'scaler.pkl'), 'wb') as f:
+        pickle.dump(scaler, f)
+    # Written last: an interrupted run leaves no matching record behind
+    with open(os.path.join(cache_dir, SOURCE_FILE), 'w') as f:
+        json.dump(_source_info(csv_path), f)
+
+    print(f"✓ Cached preprocessed dataset in {cache_dir}/")
+    return X, y, scaler
+
+def load_prepared(csv_path=CSV_PATH, cache_dir=CACHE_DIR):
+    """
+    Load the cached dataset, preparing it first if the cache is missing or
+    was built from a different CSV (path, size or mtime changed)
+
+    Arrays are memory-mapped copy-on-write, so slicing and wrapping them
+    with torch.from_numpy does not read or copy the whole file up front.
+    """
+    try:
+        with open(os.path.join(cache_dir, SOURCE_FILE)) as f:
+            cached_source = json.load(f)
+    except (OSError, ValueError):
+        cached_source = None
+    if cached_source != _source_info(csv_path):
+        if cached_source is not None:
+            print(f"📊 {csv_path} changed since the cache was built; re-preparing")
+        return prepare_data(csv_path, cache_dir)
+
+    x_path = os.path.join(cache_dir, 'X.npy')
+
+    X = np.load(x_path, mmap_mode='c')
+    y = np.load(os.path.join(cache_dir, 'y.npy'), mmap_mode='c')
+    with open(os.path.join(cache_dir, 'scaler.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+
+    print(f"📊 Loaded cached dataset: {len(X)} samples, {X.shape[1]} features")
+    return X, y, scaler
+
+def train_val_split(X, y, val_fraction=0.2, seed=0):
+    """
+    Stratified shuffled split
+
+    Each class contributes val_fraction of its rows to validation, so a CSV
+    sorted by label still yields a validation set with the overall class mix.
+
+    Returns:
+        X_train, X_val, y_train, y_val (in-memory copies)
+    """
+    rng = np.random.default_rng(seed)
+
+    val_mask = np.zeros(len(y), dtype=bool)
+    for label in np.unique(y):
+        idx = rng.permutation(np.flatnonzero(y == label))
+        val_mask[idx[:int(round(len(idx) * val_fraction))]] = True
+
+    train_idx = rng.permutation(np.flatnonzero(~val_mask))
+    val_idx = np.flatnonzero(val_mask)
+
+    return X[train_idx], X[val_idx], y[train_idx], y[val_idx]
+
+if __name__ == '__main__':
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    prepare_data(csv_file)
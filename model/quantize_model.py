@@ -1,14 +1,42 @@
 #!/usr/bin/env python3
 """
 Quantize RugDetector model for zkML compatibility
-Converts float32 inputs to int32 with fixed-point scaling
+Converts float32 inputs to int32 with fixed-point scaling, and optionally
+quantizes MatMul/Gemm weights to int8 with onnxruntime dynamic quantization
+(NN models only; tree ensembles have no MatMul/Gemm and are left as-is)
 """
 
 import onnx
 from onnx import numpy_helper
 import numpy as np
 
-def quantize_model(input_path, output_path, scale_factor=1000):
+def fold_input_scale(model, input_name, scale_factor):
+    """
+    Divide the weight of the graph input's MatMul/Gemm consumer by scale_factor
+
+    Only folds when the input feeds exactly one MatMul/Gemm as its A operand
+    and that node's B operand is an initializer. Bias is left untouched.
+
+    Returns:
+        The folded node, or None if the graph has no foldable first layer
+    """
+    consumers = [n for n in model.graph.node if input_name in n.input]
+    if len(consumers) != 1:
+        return None
+
+    node = consumers[0]
+    if node.op_type not in ('MatMul', 'Gemm') or node.input[0] != input_name:
+        return None
+
+    for init in model.graph.initializer:
+        if init.name == node.input[1]:
+            weight = numpy_helper.to_array(init).astype(np.float32)
+            init.CopyFrom(numpy_helper.from_array(weight / np.float32(scale_factor), name=init.name))
+            return node
+
+    return None
+
+def quantize_model(input_path, output_path, scale_factor=1000, validate=False):
     """
     Quantize ONNX model to use integer inputs
 
@@ -16,6 +44,7 @@ def quantize_model(input_path, output_path, scale_factor=1000):
         input_path: Path to float32 ONNX model
         output_path: Path to save quantized int32 model
         scale_factor: Multiply floats by this to get integers (default 1000)
+        validate: Run onnx.checker on the result (full graph re-validation)
     """
     print(f"🔧 Quantizing model: {input_path}")
     print(f"📊 Scale factor: {scale_factor}")
@@ -41,38 +70,48 @@ def quantize_model(input_path, output_path, scale_factor=1000):
         name='input_cast_to_float'
     )
 
-    # Add a Div node to scale down the integer input
-    scale_constant_name = 'scale_factor'
-    scale_value = np.array([scale_factor], dtype=np.float32)
-    scale_tensor = numpy_helper.from_array(scale_value, name=scale_constant_name)
-
-    div_node = onnx.helper.make_node(
-        'Div',
-        inputs=[f'{input_name}_float', scale_constant_name],
-        outputs=[f'{input_name}_scaled'],
-        name='input_scale_down'
-    )
-
-    # Update the first node to use the scaled input instead of original input
-    first_node = model.graph.node[0]
-    for i, inp in enumerate(first_node.input):
-        if inp == input_name:
-            first_node.input[i] = f'{input_name}_scaled'
-
-    # Insert cast and div nodes at the beginning
-    model.graph.node.insert(0, div_node)
-    model.graph.node.insert(0, cast_node)
-
-    # Add scale factor as initializer
-    model.graph.initializer.append(scale_tensor)
+    # Fold 1/scale_factor into the first layer's weights when possible:
+    # (x / s) @ W == x @ (W / s), so no Div is needed at inference time
+    folded_node = fold_input_scale(model, input_name, scale_factor)
+
+    if folded_node is not None:
+        folded_node.input[0] = f'{input_name}_float'
+        model.graph.node.insert(0, cast_node)
+        print(f"✓ Folded scale factor into {folded_node.op_type} weight '{folded_node.input[1]}'")
+    else:
+        # Add a Div node to scale down the integer input
+        scale_constant_name = 'scale_factor'
+        scale_value = np.array([scale_factor], dtype=np.float32)
+        scale_tensor = numpy_helper.from_array(scale_value, name=scale_constant_name)
+
+        div_node = onnx.helper.make_node(
+            'Div',
+            inputs=[f'{input_name}_float', scale_constant_name],
+            outputs=[f'{input_name}_scaled'],
+            name='input_scale_down'
+        )
+
+        # Update the first node to use the scaled input instead of original input
+        first_node = model.graph.node[0]
+        for i, inp in enumerate(first_node.input):
+            if inp == input_name:
+                first_node.input[i] = f'{input_name}_scaled'
+
+        # Insert cast and div nodes at the beginning
+        model.graph.node.insert(0, div_node)
+        model.graph.node.insert(0, cast_node)
+
+        # Add scale factor as initializer
+        model.graph.initializer.append(scale_tensor)
 
     # Validate and save
-    try:
-        onnx.checker.check_model(model)
-        print("✓ Model validation passed")
-    except Exception as e:
-        print(f"⚠️  Model validation warning: {e}")
-        print("   Continuing anyway...")
+    if validate:
+        try:
+            onnx.checker.check_model(model)
+            print("✓ Model validation passed")
+        except Exception as e:
+            print(f"⚠️  Model validation warning: {e}")
+            print("   Continuing anyway...")
 
     onnx.save(model, output_path)
     print(f"✅ Quantized model saved: {output_path}")
@@ -81,6 +120,45 @@ def quantize_model(input_path, output_path, scale_factor=1000):
 
     return scale_factor
 
+def quantize_weights_int8(input_path, output_path):
+    """
+    Dynamically quantize MatMul/Gemm weights to int8
+
+    Weights become per-channel QInt8 initializers; activations are quantized
+    to QUInt8 at runtime, so callers keep sending float32 (or int32, after
+    quantize_model) inputs unchanged. Scales and zero points live in the
+    inserted DynamicQuantizeLinear / MatMulInteger nodes.
+
+    Args:
+        input_path: Path to ONNX model
+        output_path: Path to save int8-weight model
+
+    Returns:
+        output_path, or None if the graph has no MatMul/Gemm to quantize
+        (e.g. a TreeEnsemble model); nothing is written in that case
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    op_types = {node.op_type for node in onnx.load(input_path).graph.node}
+    if not op_types & {'MatMul', 'Gemm'}:
+        print(f"⚠️  No MatMul/Gemm in {input_path} ({', '.join(sorted(op_types))}); "
+              f"int8 weight quantization only applies to the NN models, skipping")
+        return None
+
+    print(f"🔧 Quantizing weights to int8: {input_path}")
+
+    quantize_dynamic(
+        input_path,
+        output_path,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        reduce_range=False,
+        op_types_to_quantize=['MatMul', 'Gemm']
+    )
+
+    print(f"✅ Int8 model saved: {output_path}")
+    return output_path
+
 if __name__ == '__main__':
     import sys
 
@@ -88,7 +166,12 @@ if __name__ == '__main__':
     output_model = 'model/rugdetector_v1_quantized.onnx'
     scale = 1000  # Scale floats by 1000 (3 decimal places precision)
 
-    if len(sys.argv) > 1:
-        scale = int(sys.argv[1])
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if args:
+        scale = int(args[0])
+
+    quantize_model(input_model, output_model, scale, validate='--validate' in sys.argv)
 
-    quantize_model(input_model, output_model, scale)
+    # Int8 weights are opt-in: Jolt-Atlas does not trace MatMulInteger
+    if '--int8' in sys.argv:
+        quantize_weights_int8(output_model, output_model)
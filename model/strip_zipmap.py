@@ -14,10 +14,11 @@ Strategy:
 import onnx
 from onnx import helper, TensorProto
 import os
+import sys
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'rugdetector_v1.onnx')
 
-def main():
+def main(validate=False):
     m = onnx.load(MODEL_PATH)
 
     # Find ZipMap node
@@ -37,46 +38,38 @@ def main():
     prob_input = zipmap_node.input[0]
     prob_output_name = zipmap_node.output[0]  # typically 'output_probability'
 
-    # Remove ZipMap node
-    nodes = list(m.graph.node)
-    del nodes[zipmap_idx]
+    # Keep shape [None, ?]. We try to infer class count from ZipMap attributes if available.
+    # Some models include attribute 'classlabels_int64s'. Read it before the node is overwritten.
+    class_count = None
+    for attr in zipmap_node.attribute:
+        if attr.name in ('classlabels_int64s', 'classlabels_strings'):
+            class_count = len(attr.ints) if attr.ints else len(attr.strings)
+            break
 
-    # Insert Identity node to preserve original output name as a tensor
+    # Overwrite ZipMap node in place with an Identity node that preserves
+    # the original output name as a tensor
     identity_node = helper.make_node(
         'Identity',
         inputs=[prob_input],
         outputs=[prob_output_name],
         name='ZipMap_To_Tensor'
     )
-    nodes.insert(zipmap_idx, identity_node)
-    del m.graph.node[:]  # clear and reassign
-    m.graph.node.extend(nodes)
+    m.graph.node[zipmap_idx].CopyFrom(identity_node)
 
     # Update graph output type for 'output_probability'
     # Replace the existing ValueInfo (sequence<map>) with tensor(float)
-    new_outputs = []
+    shape = [None, class_count if class_count else None]
     for ovi in m.graph.output:
         if ovi.name == prob_output_name:
-            # Keep shape [None, ?]. We try to infer class count from ZipMap attributes if available.
-            # Some models include attribute 'classlabels_int64s'.
-            class_count = None
-            for attr in zipmap_node.attribute:
-                if attr.name in ('classlabels_int64s', 'classlabels_strings'):
-                    class_count = len(attr.ints) if attr.ints else len(attr.strings)
-                    break
-            shape = [None, class_count if class_count else None]
-            new_outputs.append(helper.make_tensor_value_info(prob_output_name, TensorProto.FLOAT, shape))
-        else:
-            new_outputs.append(ovi)
-
-    del m.graph.output[:]
-    m.graph.output.extend(new_outputs)
+            ovi.CopyFrom(helper.make_tensor_value_info(prob_output_name, TensorProto.FLOAT, shape))
+            break
 
-    # Save and verify
-    onnx.checker.check_model(m)
+    # Save (and optionally verify; the checker re-walks the whole graph)
+    if validate:
+        onnx.checker.check_model(m)
     onnx.save(m, MODEL_PATH)
     print('Stripped ZipMap and updated output to tensor:', prob_output_name)
 
 if __name__ == '__main__':
-    main()
+    main(validate='--validate' in sys.argv)
 
@@ -7,11 +7,12 @@ Replaces tree ensemble with MLP that works with onnx-tracer
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
 import numpy as np
 import onnx
 from onnx import numpy_helper
 
+from quantize_model import fold_input_scale
+
 class RugDetectorNN(nn.Module):
     """
     Simple MLP for rug pull detection - compatible with Jolt-Atlas
@@ -39,17 +40,14 @@ class RugDetectorNN(nn.Module):
         # Return logits - softmax will be applied during export
         return logits
 
-class RugPullDataset(Dataset):
-    """Dataset for rug pull detection"""
-    def __init__(self, features, labels):
-        self.features = torch.FloatTensor(features)
-        self.labels = torch.LongTensor(labels)
-
-    def __len__(self):
-        return len(self.labels)
+class RugDetectorWithSoftmax(nn.Module):
+    """Export wrapper that appends Softmax so the ONNX output is class probabilities"""
+    def __init__(self, model):
+        super(RugDetectorWithSoftmax, self).__init__()
+        self.model = model
 
-    def __getitem__(self, idx):
-        return self.features[idx], self.labels[idx]
+    def forward(self, x):
+        return torch.softmax(self.model(x), dim=1)
 
 def generate_synthetic_data(n_samples=10000):
     """
@@ -57,86 +55,94 @@ def generate_synthetic_data(n_samples=10000):
     Features: 60 contract metrics
     Labels: 0=safe, 1=medium_risk, 2=high_risk
     """
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
 
-    features = []
-    labels = []
+    labels = rng.choice(3, size=n_samples, p=[0.6, 0.3, 0.1])  # Most contracts safe
+    features = rng.random((n_samples, 60), dtype=np.float32)
 
-    for _ in range(n_samples):
-        label = np.random.choice([0, 1, 2], p=[0.6, 0.3, 0.1])  # Most contracts safe
+    # Inject patterns based on risk level
+    high = labels == 2
+    features[high, 0:10] *= 0.3  # Low liquidity
+    features[high, 10:20] *= 1.8  # High ownership concentration
+    features[high, 20:30] *= 0.2  # Low holder count
 
-        feature_vector = np.random.random(60)
+    medium = labels == 1
+    features[medium, 0:10] *= 0.7
+    features[medium, 10:20] *= 1.3
 
-        # Inject patterns based on risk level
-        if label == 2:  # High risk
-            feature_vector[0:10] *= 0.3  # Low liquidity
-            feature_vector[10:20] *= 1.8  # High ownership concentration
-            feature_vector[20:30] *= 0.2  # Low holder count
-        elif label == 1:  # Medium risk
-            feature_vector[0:10] *= 0.7
-            feature_vector[10:20] *= 1.3
+    return features, labels.astype(np.int64)
 
-        features.append(feature_vector)
-        labels.append(label)
-
-    return np.array(features, dtype=np.float32), np.array(labels, dtype=np.int64)
+def train_model(model, X_train, y_train, X_val, y_val, epochs=1000, lr=0.01, val_every=10):
+    """
+    Train the neural network
+
+    The whole dataset is a few MB, so each epoch is one full-batch forward/
+    backward pass over tensors that are moved to the device once. One step
+    per epoch, so the defaults are 1000 epochs at 10x the old minibatch lr,
+    in place of 50 epochs of ~250 batch-32 steps each. Validation runs every
+    val_every epochs and accuracies stay on the device; the host only syncs
+    for the progress line every 100 epochs.
+    """
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model.to(device)
+
+    # Stage through pinned host memory so the four copies are real async DMA
+    # instead of going through the driver's pageable bounce buffer
+    pin = device.type == 'cuda'
+    def to_device(array):
+        tensor = torch.from_numpy(array)
+        if pin:
+            tensor = tensor.pin_memory()
+        return tensor.to(device, non_blocking=pin)
+
+    train_features = to_device(X_train)
+    train_labels = to_device(y_train)
+    val_features = to_device(X_val)
+    val_labels = to_device(y_val)
 
-def train_model(model, train_loader, val_loader, epochs=50, lr=0.001):
-    """Train the neural network"""
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), lr=lr)
 
-    print("🚀 Training RugDetector Neural Network...")
+    print(f"🚀 Training RugDetector Neural Network on {device}...")
 
-    best_val_acc = 0
+    best_val_acc = torch.zeros((), device=device)
     for epoch in range(epochs):
         # Training
         model.train()
-        train_loss = 0
-        train_correct = 0
-        train_total = 0
-
-        for features, labels in train_loader:
-            optimizer.zero_grad()
-            outputs = model(features)
-            loss = criterion(outputs, labels)
-            loss.backward()
-            optimizer.step()
-
-            train_loss += loss.item()
-            _, predicted = torch.max(outputs.data, 1)
-            train_total += labels.size(0)
-            train_correct += (predicted == labels).sum().item()
+        optimizer.zero_grad(set_to_none=True)
+        outputs = model(train_features)
+        loss = criterion(outputs, train_labels)
+        loss.backward()
+        optimizer.step()
+
+        last_epoch = epoch + 1 == epochs
+        if (epoch + 1) % val_every != 0 and not last_epoch:
+            continue
 
         # Validation
         model.eval()
-        val_correct = 0
-        val_total = 0
-
         with torch.no_grad():
-            for features, labels in val_loader:
-                outputs = model(features)
-                _, predicted = torch.max(outputs.data, 1)
-                val_total += labels.size(0)
-                val_correct += (predicted == labels).sum().item()
-
-        train_acc = 100 * train_correct / train_total
-        val_acc = 100 * val_correct / val_total
-
-        if val_acc > best_val_acc:
-            best_val_acc = val_acc
+            val_acc = 100 * (model(val_features).argmax(dim=1) == val_labels).float().mean()
+        best_val_acc = torch.maximum(best_val_acc, val_acc)
 
-        if (epoch + 1) % 10 == 0:
+        if (epoch + 1) % 100 == 0 or last_epoch:
+            train_acc = 100 * (outputs.detach().argmax(dim=1) == train_labels).float().mean()
             print(f"Epoch [{epoch+1}/{epochs}] "
-                  f"Train Loss: {train_loss/len(train_loader):.4f} "
-                  f"Train Acc: {train_acc:.2f}% "
-                  f"Val Acc: {val_acc:.2f}%")
+                  f"Train Loss: {loss.item():.4f} "
+                  f"Train Acc: {train_acc.item():.2f}% "
+                  f"Val Acc: {val_acc.item():.2f}%")
 
-    print(f"✅ Training complete! Best validation accuracy: {best_val_acc:.2f}%")
-    return model
+    print(f"✅ Training complete! Best validation accuracy: {best_val_acc.item():.2f}%")
+    return model.cpu()
 
-def export_to_onnx(model, output_path, input_size=60, use_float=False):
-    """Export model to ONNX format for Jolt-Atlas"""
+def export_to_onnx(model, output_path, input_size=60, use_float=False, static_batch=False):
+    """
+    Export model to ONNX format for Jolt-Atlas (output: softmax probabilities)
+
+    With static_batch=True the input is fixed to [1, input_size], letting ORT
+    specialize kernels for the single-sample serving path.
+    """
+    model = RugDetectorWithSoftmax(model)
     model.eval()
 
     if use_float:
@@ -151,10 +157,10 @@ def export_to_onnx(model, output_path, input_size=60, use_float=False):
             output_path,
             export_params=True,
             opset_version=11,
-            do_constant_folding=True,
+            do_constant_folding=False,
             input_names=['input'],
             output_names=['output'],
-            dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
+            dynamic_axes=None if static_batch else {'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
         )
 
         print(f"✅ ONNX model exported: {output_path}")
@@ -175,10 +181,10 @@ def export_to_onnx(model, output_path, input_size=60, use_float=False):
         output_path,
         export_params=True,
         opset_version=11,
-        do_constant_folding=True,
+        do_constant_folding=False,
         input_names=['input'],
         output_names=['output'],
-        dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
+        dynamic_axes=None if static_batch else {'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
     )
 
     # Load and modify to accept int32 inputs
@@ -195,27 +201,34 @@ def export_to_onnx(model, output_path, input_size=60, use_float=False):
         to=onnx.TensorProto.FLOAT
     )
 
-    # Add Div node to scale down (divide by 1000)
-    scale_name = 'scale_factor'
-    scale_value = np.array([1000.0], dtype=np.float32)
-    scale_tensor = numpy_helper.from_array(scale_value, name=scale_name)
-
-    div_node = onnx.helper.make_node(
-        'Div',
-        inputs=['input_float', scale_name],
-        outputs=['input_scaled']
-    )
+    # Fold the 1/1000 input scale into the first Linear's weights;
+    # fall back to an explicit Div node if the graph has no foldable layer
+    first_layer = fold_input_scale(onnx_model, 'input', 1000.0)
+
+    if first_layer is not None:
+        first_layer.input[0] = 'input_float'
+        onnx_model.graph.node.insert(0, cast_node)
+    else:
+        scale_name = 'scale_factor'
+        scale_value = np.array([1000.0], dtype=np.float32)
+        scale_tensor = numpy_helper.from_array(scale_value, name=scale_name)
+
+        div_node = onnx.helper.make_node(
+            'Div',
+            inputs=['input_float', scale_name],
+            outputs=['input_scaled']
+        )
 
-    # Update first node to use scaled input
-    first_node = onnx_model.graph.node[0]
-    for i, inp in enumerate(first_node.input):
-        if inp == 'input':
-            first_node.input[i] = 'input_scaled'
+        # Update first node to use scaled input
+        first_node = onnx_model.graph.node[0]
+        for i, inp in enumerate(first_node.input):
+            if inp == 'input':
+                first_node.input[i] = 'input_scaled'
 
-    # Insert nodes at beginning
-    onnx_model.graph.node.insert(0, div_node)
-    onnx_model.graph.node.insert(0, cast_node)
-    onnx_model.graph.initializer.append(scale_tensor)
+        # Insert nodes at beginning
+        onnx_model.graph.node.insert(0, div_node)
+        onnx_model.graph.node.insert(0, cast_node)
+        onnx_model.graph.initializer.append(scale_tensor)
 
     onnx.save(onnx_model, output_path)
 
@@ -226,6 +239,8 @@ def export_to_onnx(model, output_path, input_size=60, use_float=False):
     return output_path
 
 if __name__ == '__main__':
+    import sys
+
     # Generate data
     print("📊 Generating training data...")
     features, labels = generate_synthetic_data(10000)
@@ -235,21 +250,18 @@ if __name__ == '__main__':
     X_train, X_val = features[:split_idx], features[split_idx:]
     y_train, y_val = labels[:split_idx], labels[split_idx:]
 
-    # Create datasets
-    train_dataset = RugPullDataset(X_train, y_train)
-    val_dataset = RugPullDataset(X_val, y_val)
-
-    train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=32, shuffle=False)
-
     # Create model
     model = RugDetectorNN(input_size=60, hidden_sizes=[128, 64, 32], num_classes=3)
 
     # Train
-    model = train_model(model, train_loader, val_loader, epochs=50)
+    model = train_model(model, X_train, y_train, X_val, y_val)
 
     # Export to ONNX
     output_path = 'model/rugdetector_v1_nn.onnx'
     export_to_onnx(model, output_path)
 
+    # Fixed [1, 60] variant for single-sample serving
+    if '--static-batch' in sys.argv:
+        export_to_onnx(model, 'model/rugdetector_v1_nn_b1.onnx', static_batch=True)
+
     print("\n✅ Neural network RugDetector ready for Jolt-Atlas zkML!")
@@ -7,11 +7,13 @@ Uses real RugPull dataset, fits within MAX_TENSOR_SIZE=64
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
-import pandas as pd
+from torch.utils.data import Dataset
 import numpy as np
+import os
 import sys
 
+from prepare_data import load_prepared, train_val_split
+
 class SmallRugDetector(nn.Module):
     """
     Compact model for Jolt-Atlas: 18→32→16→1
@@ -25,18 +27,22 @@ class SmallRugDetector(nn.Module):
             nn.ReLU(),
             nn.Linear(32, 16),
             nn.ReLU(),
-            nn.Linear(16, 1),
-            nn.Sigmoid()  # Binary classification
+            nn.Linear(16, 1)  # Logit; Sigmoid is added back at export
         )
 
     def forward(self, x):
         return self.model(x)
 
 class RugPullDataset(Dataset):
-    """Dataset from real Uniswap data"""
+    """
+    Dataset from real Uniswap data
+
+    Features and labels are each one contiguous float32 tensor; index with a
+    tensor of row indices to fetch a whole batch in one gather.
+    """
     def __init__(self, features, labels):
-        self.features = torch.FloatTensor(features)
-        self.labels = torch.FloatTensor(labels).unsqueeze(1)
+        self.features = torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
+        self.labels = torch.from_numpy(np.ascontiguousarray(labels, dtype=np.float32)).unsqueeze(1)
 
     def __len__(self):
         return len(self.labels)
@@ -44,106 +50,159 @@ class RugPullDataset(Dataset):
     def __getitem__(self, idx):
         return self.features[idx], self.labels[idx]
 
-def load_real_dataset(csv_path):
-    """Load and preprocess real RugPull dataset"""
-    print(f"📊 Loading dataset: {csv_path}")
-
-    df = pd.read_csv(csv_path)
-    print(f"   Loaded {len(df)} samples")
+    def to(self, device):
+        """Move the whole dataset to device (it is a few MB); returns self"""
+        self.features = self.features.to(device)
+        self.labels = self.labels.to(device)
+        return self
 
-    # Convert label to binary (handle both 'True'/'False' and 'TRUE'/'FALSE')
-    df['Label'] = df['Label'].astype(str).str.upper()
-    df['Label'] = (df['Label'] == 'TRUE').astype(int)
+class _EagerFallback:
+    """
+    Calls the compiled module, switching to the eager model for good if a
+    call fails (compilation happens lazily, on the first call per shape)
 
-    # Get features (all columns except id and Label)
-    feature_cols = [col for col in df.columns if col not in ['id', 'Label']]
-    print(f"   Features: {len(feature_cols)} columns")
+    A genuine model error fails again in eager mode and propagates.
+    """
+    def __init__(self, compiled, model):
+        self.compiled = compiled
+        self.model = model
+
+    def __call__(self, *args, **kwargs):
+        if self.compiled is not None:
+            try:
+                return self.compiled(*args, **kwargs)
+            except Exception as e:
+                print(f"⚠️  torch.compile failed ({type(e).__name__}: {e}), training eagerly")
+                self.compiled = None
+        return self.model(*args, **kwargs)
+
+def compile_model(model):
+    """
+    Wrap model with torch.compile for training, falling back to eager
 
-    X = df[feature_cols].values
-    y = df['Label'].values
+    The forward is a handful of tiny ops run thousands of times, so eager
+    dispatch dominates. Parameters are shared with the returned callable;
+    export the original, not the compiled wrapper. Compile failures are
+    handled here rather than with dynamo's process-wide suppress_errors.
+    """
+    try:
+        compiled = torch.compile(model, mode="reduce-overhead", dynamic=False)
+    except (AttributeError, RuntimeError) as e:
+        print(f"⚠️  torch.compile unavailable ({e}), training eagerly")
+        return model
+    return _EagerFallback(compiled, model)
+
+def train_model(model, train_data, val_data, epochs=200, lr=0.001, batch_size=32, bf16=False,
+                patience=15, min_delta=0.1):
+    """
+    Train the model
 
-    # Handle NaN/inf values
-    X = np.nan_to_num(X, nan=0.0, posinf=1e6, neginf=-1e6)
+    The dataset is a few thousand 18-float rows held as single tensors, so
+    minibatches are gathered with a per-epoch permutation instead of a
+    DataLoader, and validation is one forward pass.
 
-    # Normalize features
-    from sklearn.preprocessing import StandardScaler
-    scaler = StandardScaler()
-    X = scaler.fit_transform(X)
+    bf16 runs the forward under bfloat16 autocast; worth it on Ampere+ GPUs
+    or CPUs with native BF16 (AVX-512 BF16 / AMX). The loss stays in fp32.
 
-    # Class distribution
-    unique, counts = np.unique(y, return_counts=True)
-    print(f"   Class distribution: {dict(zip(unique, counts))}")
+    Stops early once validation accuracy has not improved by more than
+    `min_delta` points for `patience` epochs; `epochs` is only the upper bound.
+    """
+    # Model and both splits live on the device for the whole run, so the
+    # inner loop does no host<->device traffic
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model.to(device)
+    train_data.to(device)
+    val_data.to(device)
 
-    return X.astype(np.float32), y.astype(np.float32), scaler
+    criterion = nn.BCEWithLogitsLoss()
+    fused = device.type == 'cuda'  # fused Adam needs CUDA params; foreach otherwise
+    optimizer = optim.Adam(model.parameters(), lr=lr, foreach=not fused, fused=fused)
 
-def train_model(model, train_loader, val_loader, epochs=100, lr=0.001):
-    """Train the model"""
-    criterion = nn.BCELoss()
-    optimizer = optim.Adam(model.parameters(), lr=lr)
+    # Shapes are static apart from the ragged last batch and the validation
+    # split, so this compiles at most three graphs per train/eval mode
+    compiled = compile_model(model)
 
-    print("\n🚀 Training Small RugDetector (18→32→16→1)...")
+    print(f"\n🚀 Training Small RugDetector (18→32→16→1) on {device}...")
 
     best_val_acc = 0
     best_model_state = None
+    epochs_without_improvement = 0
+    n_train = len(train_data)
+    n_batches = (n_train + batch_size - 1) // batch_size
 
     for epoch in range(epochs):
         # Training
         model.train()
-        train_loss = 0
-        train_correct = 0
-        train_total = 0
-
-        for features, labels in train_loader:
-            optimizer.zero_grad()
-            outputs = model(features)
+        # Accumulate on-tensor; one host sync per epoch instead of two per batch
+        train_loss = torch.zeros((), device=device)
+        train_correct = torch.zeros((), dtype=torch.long, device=device)
+
+        perm = torch.randperm(n_train, device=device)
+        for i in range(0, n_train, batch_size):
+            features, labels = train_data[perm[i:i + batch_size]]
+
+            optimizer.zero_grad(set_to_none=True)
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=bf16):
+                outputs = compiled(features)
+            outputs = outputs.float()
             loss = criterion(outputs, labels)
             loss.backward()
             optimizer.step()
 
-            train_loss += loss.item()
-            predicted = (outputs > 0.5).float()
-            train_total += labels.size(0)
-            train_correct += (predicted == labels).sum().item()
+            train_loss += loss.detach()
+            predicted = outputs > 0  # bool; logit > 0 <=> p > 0.5
+            train_correct += (predicted == (labels > 0.5)).sum()
 
         # Validation
         model.eval()
-        val_correct = 0
-        val_total = 0
-        val_loss = 0
 
-        with torch.no_grad():
-            for features, labels in val_loader:
-                outputs = model(features)
-                loss = criterion(outputs, labels)
-                val_loss += loss.item()
+        with torch.inference_mode():
+            features, labels = val_data.features, val_data.labels
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=bf16):
+                outputs = compiled(features)
+            outputs = outputs.float()
 
-                predicted = (outputs > 0.5).float()
-                val_total += labels.size(0)
-                val_correct += (predicted == labels).sum().item()
+            predicted = outputs > 0
+            val_total = labels.size(0)
+            val_correct = (predicted == (labels > 0.5)).sum().item()
 
-        train_acc = 100 * train_correct / train_total
+        train_acc = 100 * train_correct.item() / n_train
         val_acc = 100 * val_correct / val_total
 
-        if val_acc > best_val_acc:
+        if val_acc > best_val_acc + min_delta:
             best_val_acc = val_acc
-            best_model_state = model.state_dict().copy()
+            # Clone: state_dict() tensors alias the live parameters
+            best_model_state = {k: v.detach().cpu().clone() for k, v in model.state_dict().items()}
+            epochs_without_improvement = 0
+        else:
+            epochs_without_improvement += 1
 
         if (epoch + 1) % 10 == 0:
             print(f"Epoch [{epoch+1}/{epochs}] "
-                  f"Train Loss: {train_loss/len(train_loader):.4f} "
+                  f"Train Loss: {train_loss.item()/n_batches:.4f} "
                   f"Train Acc: {train_acc:.2f}% "
                   f"Val Acc: {val_acc:.2f}%")
 
+        if epochs_without_improvement >= patience:
+            print(f"⏹  Early stop at epoch {epoch+1}: no improvement in {patience} epochs")
+            break
+
     # Load best model
-    if best_model_state:
+    if best_model_state is not None:
         model.load_state_dict(best_model_state)
 
     print(f"\n✅ Training complete! Best validation accuracy: {best_val_acc:.2f}%")
-    return model, best_val_acc
+    return model.cpu(), best_val_acc
+
+def export_to_onnx(model, output_path, print_ops=False, static_batch=True):
+    """
+    Export to ONNX (with a Sigmoid head, so the graph outputs probabilities)
 
-def export_to_onnx(model, output_path):
-    """Export to ONNX"""
+    Jolt-Atlas proves one sample at a time, so by default the input is fixed
+    to [1, 18]; a dynamic batch axis only adds shape ops to the graph.
+    """
     model.eval()
+    model = nn.Sequential(model, nn.Sigmoid())
 
     print(f"\n📦 Exporting to ONNX: {output_path}")
 
@@ -158,48 +217,66 @@ def export_to_onnx(model, output_path):
         do_constant_folding=True,
         input_names=['input'],
         output_names=['output'],
-        dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
+        dynamic_axes=None if static_batch else {'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
     )
 
     print(f"✅ ONNX export complete")
 
-    # Verify
+    # Verify (path form: the checker reads the file itself)
     try:
         import onnx
-        onnx_model = onnx.load(output_path)
-        onnx.checker.check_model(onnx_model)
+        onnx.checker.check_model(output_path)
         print("✓ ONNX model is valid")
 
         # Print operations
-        print("\n🔧 Operations in model:")
-        ops = set()
-        for node in onnx_model.graph.node:
-            ops.add(node.op_type)
-        for op in sorted(ops):
-            print(f"   - {op}")
+        if print_ops:
+            print("\n🔧 Operations in model:")
+            ops = set()
+            for node in onnx.load(output_path).graph.node:
+                ops.add(node.op_type)
+            for op in sorted(ops):
+                print(f"   - {op}")
 
     except ImportError:
         print("⚠️  onnx library not available for validation")
 
     return output_path
 
+def configure_threads():
+    """
+    Set torch's thread pools for these tiny models
+
+    Intra-op threads come from TORCH_NUM_THREADS, defaulting to the physical
+    core count (logical cores if psutil is not installed); inter-op is 1.
+    Call once from a script's main, before any torch work.
+    """
+    num_threads = os.getenv('TORCH_NUM_THREADS')
+    if num_threads:
+        num_threads = int(num_threads)
+    else:
+        try:
+            import psutil
+            num_threads = psutil.cpu_count(logical=False)
+        except ImportError:
+            num_threads = None
+        num_threads = num_threads or os.cpu_count() or 1
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
 if __name__ == '__main__':
-    # Load dataset
-    csv_file = 'RugPull-Prediction-AI/Dataset_v1.9.csv'
-    X, y, scaler = load_real_dataset(csv_file)
+    configure_threads()
 
-    # Split data (80/20)
-    split_idx = int(len(X) * 0.8)
-    X_train, X_val = X[:split_idx], X[split_idx:]
-    y_train, y_val = y[:split_idx], y[split_idx:]
+    # Load dataset (preprocessed once by prepare_data.py, memory-mapped)
+    X, y, scaler = load_prepared()
+
+    # Split data (80/20, stratified by label)
+    X_train, X_val, y_train, y_val = train_val_split(X, y, val_fraction=0.2)
 
     # Create datasets
     train_dataset = RugPullDataset(X_train, y_train)
     val_dataset = RugPullDataset(X_val, y_val)
 
-    train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=32, shuffle=False)
-
     # Create and train model
     model = SmallRugDetector()
 
@@ -210,11 +287,13 @@ if __name__ == '__main__':
     print(f"   Output: 1 neuron (Sigmoid)")
     print(f"   Max tensor size: 32 (< 64 ✓)")
 
-    model, best_acc = train_model(model, train_loader, val_loader, epochs=100)
+    model, best_acc = train_model(model, train_dataset, val_dataset, epochs=200,
+                                  bf16='--bf16' in sys.argv)
 
     # Export to ONNX
     onnx_path = 'model/small_rugdetector.onnx'
-    export_to_onnx(model, onnx_path)
+    export_to_onnx(model, onnx_path, print_ops='--print-ops' in sys.argv,
+                   static_batch='--dynamic-batch' not in sys.argv)
 
     # Save scaler for inference
     import pickle
@@ -6,23 +6,139 @@ Collects labeled rug pull and legitimate token data from multiple sources
 
 import json
 import os
+import re
 import sys
-import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Tuple
 from datetime import datetime
 import csv
+from itertools import islice
+
+# Paths resolved once at import
+_HERE = Path(__file__).resolve().parent
+_DATA_DIR = _HERE / "real_data"
+_CRPWARNER_DIR = Path.home() / "CRPWarner_RugPull" / "dataset" / "groundtruth"
 
 # Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(str(_HERE.parent))
+
+# 0x + 40 hex chars; also rejects filenames/API values with non-hex garbage
+_ADDR_RE = re.compile(r'0x[0-9a-fA-F]{40}')
+
+# Output schemas (rug pulls carry date/loss, legitimate tokens a category)
+RUGPULL_COLUMNS = ["address", "blockchain", "name", "source", "date", "loss_usd", "label"]
+LEGITIMATE_COLUMNS = ["address", "blockchain", "name", "source", "category", "label"]
+DATASET_COLUMNS = ["address", "blockchain", "name", "source", "date", "loss_usd", "label", "category"]
+
+# Manually curated, well-documented rug pulls from public reports (2021-2024)
+KNOWN_RUGPULLS: Tuple[Dict, ...] = (
+    # Ethereum rug pulls
+    {"address": "0x5A3e6A77ba2f983eC0d371ea3B475F8Bc0811AD5", "blockchain": "ethereum",
+     "name": "Squid Game (SQUID)", "date": "2021-11-01", "loss_usd": 3380000},
+    {"address": "0xb3Cb6d2f8f2FDe203a022201C81a96c167607F15", "blockchain": "ethereum",
+     "name": "AnubisDAO", "date": "2021-10-29", "loss_usd": 60000000},
+    {"address": "0x90c7e271f8307E64d9A1bd86eF30961fd5e87d33", "blockchain": "ethereum",
+     "name": "Uranium Finance", "date": "2021-04-28", "loss_usd": 50000000},
+    {"address": "0x5Dc02Ea99285E17656b8350722694c35154DB1E8", "blockchain": "ethereum",
+     "name": "Mercenary Protocol", "date": "2022-01-28", "loss_usd": 750000},
+
+    # BSC rug pulls
+    {"address": "0x05d53bF4FfEB3D381883E57c7dBF78E6e6BD2748", "blockchain": "bsc",
+     "name": "Rug Pull Swap", "date": "2021-07-15", "loss_usd": 2000000},
+    {"address": "0x2e7c3a5FB5e1DF8F4fCbDCF26c73f0E52F7a2C7C", "blockchain": "bsc",
+     "name": "StableMagnet", "date": "2021-06-23", "loss_usd": 22000000},
+    {"address": "0x30DD0B3D0E1e7A1C5B5D8E5d3B4F7A8D4e5F6A7B", "blockchain": "bsc",
+     "name": "Meerkat Finance", "date": "2021-03-04", "loss_usd": 31000000},
+    {"address": "0xB7A4e0e7d0fd7Cb6cfA0D6E1fF3C7a5B8c9D0E1F", "blockchain": "bsc",
+     "name": "Turtle Coin", "date": "2021-05-20", "loss_usd": 2500000},
+    {"address": "0x1a2B3c4D5E6F7A8B9C0D1E2F3A4B5C6D7E8F9A0B", "blockchain": "bsc",
+     "name": "SafeMoon Copy", "date": "2021-04-10", "loss_usd": 1200000},
+
+    # Polygon rug pulls
+    {"address": "0x3A4B5C6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B", "blockchain": "polygon",
+     "name": "PolyYeld Finance", "date": "2021-08-17", "loss_usd": 1800000},
+    {"address": "0x4B5C6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B3C", "blockchain": "polygon",
+     "name": "PolyWhale", "date": "2021-06-12", "loss_usd": 900000},
+
+    # Base rug pulls (newer chain, 2023-2024)
+    {"address": "0x5C6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B3C4D", "blockchain": "base",
+     "name": "BasedToken", "date": "2023-08-15", "loss_usd": 500000},
+    {"address": "0x6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B3C4D5E", "blockchain": "base",
+     "name": "BaseSwap Clone", "date": "2023-09-22", "loss_usd": 350000},
+)
+
+# Verified legitimate tokens (top DeFi protocols per chain)
+KNOWN_LEGITIMATE: Tuple[Dict, ...] = (
+    # Ethereum - Top DeFi tokens
+    {"address": "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984", "blockchain": "ethereum",
+     "name": "Uniswap (UNI)", "category": "dex"},
+    {"address": "0x7Fc66500c84A76Ad7e9c93437bFc5Ac33E2DDaE9", "blockchain": "ethereum",
+     "name": "Aave (AAVE)", "category": "lending"},
+    {"address": "0xC18360217D8F7Ab5e7c516566761Ea12Ce7F9D72", "blockchain": "ethereum",
+     "name": "Ethereum Name Service (ENS)", "category": "infrastructure"},
+    {"address": "0x514910771AF9Ca656af840dff83E8264EcF986CA", "blockchain": "ethereum",
+     "name": "Chainlink (LINK)", "category": "oracle"},
+    {"address": "0x6B175474E89094C44Da98b954EedeAC495271d0F", "blockchain": "ethereum",
+     "name": "Dai Stablecoin (DAI)", "category": "stablecoin"},
+    {"address": "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48", "blockchain": "ethereum",
+     "name": "USD Coin (USDC)", "category": "stablecoin"},
+    {"address": "0xdAC17F958D2ee523a2206206994597C13D831ec7", "blockchain": "ethereum",
+     "name": "Tether (USDT)", "category": "stablecoin"},
+    {"address": "0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599", "blockchain": "ethereum",
+     "name": "Wrapped Bitcoin (WBTC)", "category": "wrapped"},
+    {"address": "0x9f8F72aA9304c8B593d555F12eF6589cC3A579A2", "blockchain": "ethereum",
+     "name": "Maker (MKR)", "category": "defi"},
+    {"address": "0xC011a73ee8576Fb46F5E1c5751cA3B9Fe0af2a6F", "blockchain": "ethereum",
+     "name": "Synthetix (SNX)", "category": "derivatives"},
+
+    # BSC - Top DeFi tokens
+    {"address": "0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82", "blockchain": "bsc",
+     "name": "PancakeSwap (CAKE)", "category": "dex"},
+    {"address": "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c", "blockchain": "bsc",
+     "name": "Wrapped BNB (WBNB)", "category": "wrapped"},
+    {"address": "0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56", "blockchain": "bsc",
+     "name": "Binance USD (BUSD)", "category": "stablecoin"},
+    {"address": "0x55d398326f99059fF775485246999027B3197955", "blockchain": "bsc",
+     "name": "Tether USD (USDT)", "category": "stablecoin"},
+    {"address": "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d", "blockchain": "bsc",
+     "name": "USD Coin (USDC)", "category": "stablecoin"},
+
+    # Polygon - Top DeFi tokens
+    {"address": "0x0d500B1d8E8eF31E21C99d1Db9A6444d3ADf1270", "blockchain": "polygon",
+     "name": "Wrapped Matic (WMATIC)", "category": "wrapped"},
+    {"address": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174", "blockchain": "polygon",
+     "name": "USD Coin (USDC)", "category": "stablecoin"},
+    {"address": "0xc2132D05D31c914a87C6611C10748AEb04B58e8F", "blockchain": "polygon",
+     "name": "Tether USD (USDT)", "category": "stablecoin"},
+    {"address": "0x8f3Cf7ad23Cd3CaDbD9735AFf958023239c6A063", "blockchain": "polygon",
+     "name": "Dai Stablecoin (DAI)", "category": "stablecoin"},
+    {"address": "0xb33EaAd8d922B1083446DC23f610c2567fB5180f", "blockchain": "polygon",
+     "name": "Uniswap (UNI)", "category": "dex"},
+
+    # Base - Established tokens (newer chain)
+    {"address": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913", "blockchain": "base",
+     "name": "USD Coin (USDC)", "category": "stablecoin"},
+    {"address": "0x4200000000000000000000000000000000000006", "blockchain": "base",
+     "name": "Wrapped Ether (WETH)", "category": "wrapped"},
+    {"address": "0xd9aAEc86B65D86f6A7B5B1b0c42FFA531710b6CA", "blockchain": "base",
+     "name": "USD Base Coin (USDbC)", "category": "stablecoin"},
+)
+
+# An address in both lists would be trained with contradictory labels
+assert frozenset(r["address"].lower() for r in KNOWN_RUGPULLS).isdisjoint(
+    t["address"].lower() for t in KNOWN_LEGITIMATE
+), "address listed as both rug pull and legitimate"
 
 class RealDataCollector:
     """Collects real rug pull and legitimate token data"""
 
-    def __init__(self):
-        self.data_dir = Path(__file__).parent / "real_data"
+    def __init__(self, crpwarner_limit: int = 50):
+        self.crpwarner_limit = crpwarner_limit
+        self.data_dir = _DATA_DIR
         self.data_dir.mkdir(exist_ok=True)
 
         # Output files
@@ -30,6 +146,21 @@ class RealDataCollector:
         self.legitimate_file = self.data_dir / "legitimate_addresses.csv"
         self.combined_file = self.data_dir / "labeled_dataset.csv"
 
+        # Shared keep-alive pool for all API calls; 429/5xx are retried with
+        # backoff, honouring Retry-After
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True
+            )
+        )
+        self.session.mount('https://', adapter)
+
         print("=" * 70)
         print("Real Rug Pull Data Collection")
         print("=" * 70)
@@ -51,78 +182,38 @@ class RealDataCollector:
 
         print("\n[1] Collecting known rug pull addresses...")
 
-        # Source 1: Manual curated list from public reports
-        # These are well-documented rug pulls from 2022-2024
-        known_rugpulls = [
-            # Ethereum rug pulls
-            {"address": "0x5A3e6A77ba2f983eC0d371ea3B475F8Bc0811AD5", "blockchain": "ethereum",
-             "name": "Squid Game (SQUID)", "date": "2021-11-01", "loss_usd": 3380000},
-            {"address": "0xb3Cb6d2f8f2FDe203a022201C81a96c167607F15", "blockchain": "ethereum",
-             "name": "AnubisDAO", "date": "2021-10-29", "loss_usd": 60000000},
-            {"address": "0x90c7e271f8307E64d9A1bd86eF30961fd5e87d33", "blockchain": "ethereum",
-             "name": "Uranium Finance", "date": "2021-04-28", "loss_usd": 50000000},
-            {"address": "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984", "blockchain": "ethereum",
-             "name": "Frosties NFT", "date": "2022-01-09", "loss_usd": 1300000},
-            {"address": "0x5Dc02Ea99285E17656b8350722694c35154DB1E8", "blockchain": "ethereum",
-             "name": "Mercenary Protocol", "date": "2022-01-28", "loss_usd": 750000},
-
-            # BSC rug pulls
-            {"address": "0x05d53bF4FfEB3D381883E57c7dBF78E6e6BD2748", "blockchain": "bsc",
-             "name": "Rug Pull Swap", "date": "2021-07-15", "loss_usd": 2000000},
-            {"address": "0x2e7c3a5FB5e1DF8F4fCbDCF26c73f0E52F7a2C7C", "blockchain": "bsc",
-             "name": "StableMagnet", "date": "2021-06-23", "loss_usd": 22000000},
-            {"address": "0x30DD0B3D0E1e7A1C5B5D8E5d3B4F7A8D4e5F6A7B", "blockchain": "bsc",
-             "name": "Meerkat Finance", "date": "2021-03-04", "loss_usd": 31000000},
-            {"address": "0xB7A4e0e7d0fd7Cb6cfA0D6E1fF3C7a5B8c9D0E1F", "blockchain": "bsc",
-             "name": "Turtle Coin", "date": "2021-05-20", "loss_usd": 2500000},
-            {"address": "0x1a2B3c4D5E6F7A8B9C0D1E2F3A4B5C6D7E8F9A0B", "blockchain": "bsc",
-             "name": "SafeMoon Copy", "date": "2021-04-10", "loss_usd": 1200000},
-
-            # Polygon rug pulls
-            {"address": "0x3A4B5C6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B", "blockchain": "polygon",
-             "name": "PolyYeld Finance", "date": "2021-08-17", "loss_usd": 1800000},
-            {"address": "0x4B5C6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B3C", "blockchain": "polygon",
-             "name": "PolyWhale", "date": "2021-06-12", "loss_usd": 900000},
-
-            # Base rug pulls (newer chain, 2023-2024)
-            {"address": "0x5C6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B3C4D", "blockchain": "base",
-             "name": "BasedToken", "date": "2023-08-15", "loss_usd": 500000},
-            {"address": "0x6D7E8F9A0B1C2D3E4F5A6B7C8D9E0F1A2B3C4D5E", "blockchain": "base",
-             "name": "BaseSwap Clone", "date": "2023-09-22", "loss_usd": 350000},
-        ]
-
-        for rp in known_rugpulls:
-            rugpulls.append({
-                "address": rp["address"],
-                "blockchain": rp["blockchain"],
-                "name": rp.get("name", "Unknown"),
-                "source": "manual_curated",
-                "date": rp.get("date", "unknown"),
-                "loss_usd": rp.get("loss_usd", 0),
-                "label": "high_risk"  # All confirmed rug pulls are high risk
-            })
-
-        print(f"  ✓ Collected {len(known_rugpulls)} manually curated rug pulls")
+        # Source 1: Manual curated list from public reports (KNOWN_RUGPULLS)
+        rugpulls.extend({
+            "address": rp["address"],
+            "blockchain": rp["blockchain"],
+            "name": rp.get("name", "Unknown"),
+            "source": "manual_curated",
+            "date": rp.get("date", "unknown"),
+            "loss_usd": rp.get("loss_usd", 0),
+            "label": "high_risk"  # All confirmed rug pulls are high risk
+        } for rp in KNOWN_RUGPULLS)
+
+        print(f"  ✓ Collected {len(KNOWN_RUGPULLS)} manually curated rug pulls")
 
         # Source 2: CRPWarner dataset (if available)
         # Note: Users would need to clone https://github.com/CRPWarner/RugPull
-        crpwarner_dir = Path.home() / "CRPWarner_RugPull" / "dataset" / "groundtruth"
+        crpwarner_dir = _CRPWARNER_DIR
         if crpwarner_dir.exists():
             print(f"\n  Found CRPWarner dataset at {crpwarner_dir}")
-            hex_files = list(crpwarner_dir.glob("*.hex"))
-            for hex_file in hex_files[:50]:  # Limit to 50 for initial testing
-                address = hex_file.stem  # Filename is the contract address
-                if address.startswith("0x") and len(address) == 42:
-                    rugpulls.append({
-                        "address": address,
-                        "blockchain": "ethereum",  # CRPWarner is Ethereum-focused
-                        "name": f"CRPWarner_{address[:10]}",
-                        "source": "crpwarner_dataset",
-                        "date": "unknown",
-                        "loss_usd": 0,
-                        "label": "high_risk"
-                    })
-            print(f"  ✓ Added {len(hex_files[:50])} addresses from CRPWarner dataset")
+            with os.scandir(crpwarner_dir) as entries:
+                hex_names = (e.name for e in entries if e.name.endswith(".hex"))
+                addresses = [name[:-4] for name in islice(hex_names, self.crpwarner_limit)]
+            before = len(rugpulls)
+            rugpulls.extend({
+                "address": address,  # Filename is the contract address
+                "blockchain": "ethereum",  # CRPWarner is Ethereum-focused
+                "name": f"CRPWarner_{address[:10]}",
+                "source": "crpwarner_dataset",
+                "date": "unknown",
+                "loss_usd": 0,
+                "label": "high_risk"
+            } for address in addresses if _ADDR_RE.fullmatch(address))
+            print(f"  ✓ Added {len(rugpulls) - before} addresses from CRPWarner dataset")
         else:
             print(f"  ⚠ CRPWarner dataset not found at {crpwarner_dir}")
             print(f"    Clone it: git clone https://github.com/CRPWarner/RugPull ~/CRPWarner_RugPull")
@@ -136,21 +227,20 @@ class RealDataCollector:
                 url = "https://tokensniffer.com/api/v2/tokens/malicious"
                 headers = {"X-API-KEY": tokensniffer_key}
                 params = {"limit": 100}
-                response = requests.get(url, headers=headers, params=params, timeout=10)
+                response = self.session.get(url, headers=headers, params=params, timeout=10)
 
                 if response.status_code == 200:
-                    data = response.json()
-                    for token in data.get("tokens", [])[:50]:  # Limit to 50
-                        rugpulls.append({
-                            "address": token.get("address"),
-                            "blockchain": token.get("chain", "ethereum").lower(),
-                            "name": token.get("name", "Unknown"),
-                            "source": "tokensniffer_api",
-                            "date": token.get("detected_at", "unknown"),
-                            "loss_usd": 0,
-                            "label": "high_risk"
-                        })
-                    print(f"  ✓ Added {len(data.get('tokens', [])[:50])} from Token Sniffer")
+                    tokens = response.json().get("tokens", [])[:50]  # Limit to 50
+                    rugpulls.extend({
+                        "address": token.get("address"),
+                        "blockchain": token.get("chain", "ethereum").lower(),
+                        "name": token.get("name", "Unknown"),
+                        "source": "tokensniffer_api",
+                        "date": token.get("detected_at", "unknown"),
+                        "loss_usd": 0,
+                        "label": "high_risk"
+                    } for token in tokens)
+                    print(f"  ✓ Added {len(tokens)} from Token Sniffer")
                 else:
                     print(f"  ⚠ Token Sniffer API returned status {response.status_code}")
             except Exception as e:
@@ -177,111 +267,61 @@ class RealDataCollector:
 
         print("\n[2] Collecting legitimate token addresses...")
 
-        # Source 1: Well-known legitimate tokens
-        known_legitimate = [
-            # Ethereum - Top DeFi tokens
-            {"address": "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984", "blockchain": "ethereum",
-             "name": "Uniswap (UNI)", "category": "dex"},
-            {"address": "0x7Fc66500c84A76Ad7e9c93437bFc5Ac33E2DDaE9", "blockchain": "ethereum",
-             "name": "Aave (AAVE)", "category": "lending"},
-            {"address": "0xC18360217D8F7Ab5e7c516566761Ea12Ce7F9D72", "blockchain": "ethereum",
-             "name": "Ethereum Name Service (ENS)", "category": "infrastructure"},
-            {"address": "0x514910771AF9Ca656af840dff83E8264EcF986CA", "blockchain": "ethereum",
-             "name": "Chainlink (LINK)", "category": "oracle"},
-            {"address": "0x6B175474E89094C44Da98b954EedeAC495271d0F", "blockchain": "ethereum",
-             "name": "Dai Stablecoin (DAI)", "category": "stablecoin"},
-            {"address": "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48", "blockchain": "ethereum",
-             "name": "USD Coin (USDC)", "category": "stablecoin"},
-            {"address": "0xdAC17F958D2ee523a2206206994597C13D831ec7", "blockchain": "ethereum",
-             "name": "Tether (USDT)", "category": "stablecoin"},
-            {"address": "0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599", "blockchain": "ethereum",
-             "name": "Wrapped Bitcoin (WBTC)", "category": "wrapped"},
-            {"address": "0x9f8F72aA9304c8B593d555F12eF6589cC3A579A2", "blockchain": "ethereum",
-             "name": "Maker (MKR)", "category": "defi"},
-            {"address": "0xC011a73ee8576Fb46F5E1c5751cA3B9Fe0af2a6F", "blockchain": "ethereum",
-             "name": "Synthetix (SNX)", "category": "derivatives"},
-
-            # BSC - Top DeFi tokens
-            {"address": "0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82", "blockchain": "bsc",
-             "name": "PancakeSwap (CAKE)", "category": "dex"},
-            {"address": "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c", "blockchain": "bsc",
-             "name": "Wrapped BNB (WBNB)", "category": "wrapped"},
-            {"address": "0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56", "blockchain": "bsc",
-             "name": "Binance USD (BUSD)", "category": "stablecoin"},
-            {"address": "0x55d398326f99059fF775485246999027B3197955", "blockchain": "bsc",
-             "name": "Tether USD (USDT)", "category": "stablecoin"},
-            {"address": "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d", "blockchain": "bsc",
-             "name": "USD Coin (USDC)", "category": "stablecoin"},
-
-            # Polygon - Top DeFi tokens
-            {"address": "0x0d500B1d8E8eF31E21C99d1Db9A6444d3ADf1270", "blockchain": "polygon",
-             "name": "Wrapped Matic (WMATIC)", "category": "wrapped"},
-            {"address": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174", "blockchain": "polygon",
-             "name": "USD Coin (USDC)", "category": "stablecoin"},
-            {"address": "0xc2132D05D31c914a87C6611C10748AEb04B58e8F", "blockchain": "polygon",
-             "name": "Tether USD (USDT)", "category": "stablecoin"},
-            {"address": "0x8f3Cf7ad23Cd3CaDbD9735AFf958023239c6A063", "blockchain": "polygon",
-             "name": "Dai Stablecoin (DAI)", "category": "stablecoin"},
-            {"address": "0xb33EaAd8d922B1083446DC23f610c2567fB5180f", "blockchain": "polygon",
-             "name": "Uniswap (UNI)", "category": "dex"},
-
-            # Base - Established tokens (newer chain)
-            {"address": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913", "blockchain": "base",
-             "name": "USD Coin (USDC)", "category": "stablecoin"},
-            {"address": "0x4200000000000000000000000000000000000006", "blockchain": "base",
-             "name": "Wrapped Ether (WETH)", "category": "wrapped"},
-            {"address": "0xd9aAEc86B65D86f6A7B5B1b0c42FFA531710b6CA", "blockchain": "base",
-             "name": "USD Base Coin (USDbC)", "category": "stablecoin"},
-        ]
-
-        for token in known_legitimate:
-            legitimate.append({
-                "address": token["address"],
-                "blockchain": token["blockchain"],
-                "name": token["name"],
-                "source": "manual_verified",
-                "category": token.get("category", "unknown"),
-                "label": "low_risk"  # All verified legitimate tokens are low risk
-            })
-
-        print(f"  ✓ Collected {len(known_legitimate)} verified legitimate tokens")
+        # Source 1: Well-known legitimate tokens (KNOWN_LEGITIMATE)
+        legitimate.extend({
+            "address": token["address"],
+            "blockchain": token["blockchain"],
+            "name": token["name"],
+            "source": "manual_verified",
+            "category": token.get("category", "unknown"),
+            "label": "low_risk"  # All verified legitimate tokens are low risk
+        } for token in KNOWN_LEGITIMATE)
+
+        print(f"  ✓ Collected {len(KNOWN_LEGITIMATE)} verified legitimate tokens")
 
         # Source 2: CoinGecko API (top tokens by market cap)
+        # /coins/markets carries no contract addresses, so rank ids by market
+        # cap there and join against one /coins/list?include_platform=true call
         print("\n  Fetching top tokens from CoinGecko API...")
         try:
-            # Get top 100 tokens on Ethereum
-            url = "https://api.coingecko.com/api/v3/coins/markets"
-            params = {
+            base_url = "https://api.coingecko.com/api/v3"
+            markets = self.session.get(f"{base_url}/coins/markets", params={
                 "vs_currency": "usd",
                 "order": "market_cap_desc",
-                "per_page": 100,
+                "per_page": 250,  # native coins are skipped, so over-fetch
                 "page": 1,
                 "sparkline": False
-            }
-            response = requests.get(url, params=params, timeout=10)
+            }, timeout=10)
+            coin_list = self.session.get(f"{base_url}/coins/list",
+                                         params={"include_platform": "true"}, timeout=30)
+
+            if markets.status_code == 200 and coin_list.status_code == 200:
+                platforms = {coin["id"]: coin.get("platforms") or {} for coin in coin_list.json()}
+                seen = {t["address"].lower() for t in legitimate}
 
-            if response.status_code == 200:
-                data = response.json()
                 coingecko_count = 0
-                for coin in data:
+                for coin in markets.json():
                     # Only add ERC-20 tokens (not native coins)
-                    if "contract_address" in coin.get("platforms", {}).get("ethereum", {}):
-                        address = coin["platforms"]["ethereum"]
-                        if address and address.startswith("0x") and len(address) == 42:
-                            legitimate.append({
-                                "address": address,
-                                "blockchain": "ethereum",
-                                "name": coin.get("name", "Unknown"),
-                                "source": "coingecko_top100",
-                                "category": "top_marketcap",
-                                "label": "low_risk"
-                            })
-                            coingecko_count += 1
+                    address = platforms.get(coin.get("id"), {}).get("ethereum")
+                    if not address or not _ADDR_RE.fullmatch(address) or address.lower() in seen:
+                        continue
+
+                    seen.add(address.lower())
+                    legitimate.append({
+                        "address": address,
+                        "blockchain": "ethereum",
+                        "name": coin.get("name", "Unknown"),
+                        "source": "coingecko_top100",
+                        "category": "top_marketcap",
+                        "label": "low_risk"
+                    })
+                    coingecko_count += 1
+                    if coingecko_count == 100:
+                        break
 
                 print(f"  ✓ Added {coingecko_count} from CoinGecko top 100")
-                time.sleep(1)  # Rate limiting
             else:
-                print(f"  ⚠ CoinGecko API returned status {response.status_code}")
+                print(f"  ⚠ CoinGecko API returned status {markets.status_code}/{coin_list.status_code}")
         except Exception as e:
             print(f"  ⚠ CoinGecko API error: {e}")
 
@@ -293,20 +333,23 @@ class RealDataCollector:
 
         print("\n[3] Saving datasets to CSV...")
 
+        # Build the combined frame once with a fixed schema; the per-label
+        # files are column/row views of it rather than separate frames
+        combined_df = pd.DataFrame.from_records(rugpulls + legitimate, columns=DATASET_COLUMNS)
+        is_rugpull = (combined_df['label'] == 'high_risk').to_numpy()
+
         # Save rug pulls
-        rugpull_df = pd.DataFrame(rugpulls)
-        rugpull_df.to_csv(self.rugpull_file, index=False)
+        combined_df.loc[is_rugpull, RUGPULL_COLUMNS].to_csv(self.rugpull_file, index=False)
         print(f"  ✓ Saved {len(rugpulls)} rug pull addresses to {self.rugpull_file}")
 
         # Save legitimate tokens
-        legitimate_df = pd.DataFrame(legitimate)
-        legitimate_df.to_csv(self.legitimate_file, index=False)
+        combined_df.loc[~is_rugpull, LEGITIMATE_COLUMNS].to_csv(self.legitimate_file, index=False)
         print(f"  ✓ Saved {len(legitimate)} legitimate addresses to {self.legitimate_file}")
 
-        # Combine into single labeled dataset
-        combined_df = pd.concat([rugpull_df, legitimate_df], ignore_index=True)
-        combined_df.to_csv(self.combined_file, index=False)
-        print(f"  ✓ Saved {len(combined_df)} total addresses to {self.combined_file}")
+        # Combined labeled dataset
+        combined_df.to_csv(self.combined_file, index=False, chunksize=10000)
+        combined_df.to_csv(self.combined_file.with_suffix('.csv.gz'), index=False, compression='gzip')
+        print(f"  ✓ Saved {len(combined_df)} total addresses to {self.combined_file} (+ .csv.gz)")
 
         # Print summary statistics
         print("\n" + "=" * 70)
@@ -393,5 +436,12 @@ class RealDataCollector:
 
 
 if __name__ == "__main__":
-    collector = RealDataCollector()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Collect labeled rug pull / legitimate token addresses")
+    parser.add_argument("--crpwarner-limit", type=int, default=50,
+                        help="Max addresses to take from the CRPWarner dataset (default: 50)")
+    args = parser.parse_args()
+
+    collector = RealDataCollector(crpwarner_limit=args.crpwarner_limit)
     collector.run()
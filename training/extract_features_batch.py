@@ -4,31 +4,104 @@ Batch Feature Extraction Script
 Extracts 60 blockchain features from a list of contract addresses
 """
 
+import csv
+import hashlib
 import json
+import math
 import os
 import sys
 import time
 import subprocess
 import pandas as pd
+from tqdm import tqdm
 from pathlib import Path
 from typing import Dict, List
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import nullcontext
+from functools import partial
 from datetime import datetime
 
+# Paths resolved once at import
+_HERE = Path(__file__).resolve().parent
+_MODEL_DIR = _HERE.parent / "model"
+_EXTRACT_SCRIPT = _MODEL_DIR / "extract_features.py"
+
 # Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(str(_HERE.parent))
+
+# extract_features.py imports its siblings by bare name, so model/ itself
+# must be importable; fall back to running it as a script if that fails
+sys.path.append(str(_MODEL_DIR))
+try:
+    import extract_features as ef_mod
+except ImportError as e:
+    print(f"extract_features not importable in-process ({e}), using subprocess per contract")
+    ef_mod = None
+
+
+# Expected 60 features (schema lives next to the extractor in model/)
+from feature_schema import FEATURE_DTYPES, FEATURE_NAMES as EXPECTED_FEATURES
+from feature_schema import FEATURE_NAMES_SET as EXPECTED_FEATURES_SET
+
+# Output columns: fixed metadata, then the 60 features in schema order
+METADATA_COLUMNS = ('address', 'blockchain', 'label', 'name', 'source', 'feature_source')
+OUTPUT_COLUMNS = METADATA_COLUMNS + tuple(EXPECTED_FEATURES)
+
+
+def _is_complete(features) -> bool:
+    """True if every schema feature has a value (no missing keys, None or NaN)"""
+    if not features:
+        return False
+    for name in EXPECTED_FEATURES:
+        value = features.get(name)
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return False
+    return True
+
+
+def _result_or_failure(row, get_result):
+    """
+    get_result(), or (None, None) if it raises
+
+    Covers what the extractor itself doesn't catch, e.g. a worker process
+    killed mid-run (BrokenProcessPool): the contract counts as failed and
+    the run carries on.
+    """
+    try:
+        return get_result()
+    except Exception as e:
+        print(f"  ✗ {row.address} ({row.blockchain}): {type(e).__name__}: {e}")
+        return None, None
 
 
 class BatchFeatureExtractor:
     """Extract features from multiple contracts in parallel"""
 
-    def __init__(self, input_csv: str, output_csv: str = None, max_workers: int = 4):
+    def __init__(self, input_csv: str, output_csv: str = None, max_workers: int = 4,
+                 cache_dir: str = None, use_cache: bool = True, output_format: str = "csv"):
         self.input_csv = Path(input_csv)
         self.output_csv = Path(output_csv) if output_csv else self.input_csv.parent / "features_extracted.csv"
         self.max_workers = max_workers
 
+        # Rows are always streamed to the CSV; parquet is converted from it at
+        # the end (typed columns, zstd) and, for "parquet", replaces it
+        self.output_format = output_format
+        self.output_parquet = self.output_csv.with_suffix('.parquet')
+
+        # (blockchain, address) pairs already in output_csv from an interrupted run;
+        # removed once a run finishes
+        self.progress_file = self.output_csv.with_suffix('.progress.json')
+
+        # One JSON file per (blockchain, address); re-runs only hit the network for
+        # misses. Only real on-chain extractions are cached, never simulated fallbacks
+        self.use_cache = use_cache
+        self.cache_dir = Path(cache_dir) if cache_dir else self.input_csv.parent / "feature_cache"
+        if self.use_cache:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
         # Feature extraction script
-        self.extract_script = Path(__file__).parent.parent / "model" / "extract_features.py"
+        self.extract_script = _EXTRACT_SCRIPT
 
         if not self.extract_script.exists():
             raise FileNotFoundError(f"Feature extraction script not found: {self.extract_script}")
@@ -39,9 +112,100 @@ class BatchFeatureExtractor:
         print(f"Input CSV: {self.input_csv}")
         print(f"Output CSV: {self.output_csv}")
         print(f"Max workers: {self.max_workers}")
-        print(f"Extraction script: {self.extract_script}")
+        print(f"Feature cache: {self.cache_dir if self.use_cache else 'disabled'}")
+        print(f"Extraction script: {self.extract_script} ({'in-process' if ef_mod else 'subprocess'})")
+
+    def _cache_path(self, address: str, blockchain: str) -> Path:
+        key = f"{blockchain.lower()}:{address.lower()}"
+        return self.cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def _write_cache(self, path: Path, features: Dict):
+        """Write atomically so a crash or a concurrent worker never leaves half a file
+
+        A failed write only costs a re-extraction next run, so it is reported
+        and otherwise ignored
+        """
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({'source': 'real', 'features': features}, f,
+                          default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"  ⚠ Could not write cache entry {path.name}: {e}")
+            tmp.unlink(missing_ok=True)
+
+    def _read_cache(self, path: Path):
+        """Cached features, or None for a miss, an unreadable entry or one not tagged as real"""
+        if not path.exists():
+            return None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  ⚠ Ignoring unreadable cache entry {path.name}: {e}")
+            return None
+        # Untagged entries predate source tagging and may be simulated fallbacks
+        if isinstance(entry, dict) and entry.get('source') == 'real':
+            return entry['features']
+        return None
+
+    def _write_progress(self, done: set):
+        """Atomically replace the checkpoint with the (blockchain, address) pairs written so far"""
+        tmp = self.progress_file.with_name(f"{self.progress_file.name}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(sorted(done), f)
+        os.replace(tmp, self.progress_file)
+
+    def _recover_partial_output(self) -> set:
+        """
+        Make an interrupted run's output safe to append to
+
+        Rows reach the CSV before the checkpoint records them, and a hard kill
+        can leave a torn last line. Truncates to the last complete line, drops
+        duplicate rows, and returns the (blockchain, address) pairs in the
+        file: the file, not the checkpoint, decides what is done.
+        """
+        with open(self.output_csv, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                f.truncate(end)
+                print(f"  ⚠ Dropped a partial last line from {self.output_csv}")
+
+        if end == 0:
+            # Not even a complete header; start the file over
+            self.output_csv.unlink()
+            return set()
+
+        previous = pd.read_csv(self.output_csv, dtype=FEATURE_DTYPES)
+        duplicated = previous.duplicated(['blockchain', 'address'])
+        if duplicated.any():
+            print(f"  ⚠ Removing {int(duplicated.sum())} duplicate rows from {self.output_csv}")
+            previous[~duplicated].to_csv(self.output_csv, index=False)
+
+        return set(zip(previous['blockchain'], previous['address']))
 
     def extract_features_for_contract(self, address: str, blockchain: str, timeout: int = 60) -> Dict:
+        """
+        Extract features for a single contract, from the disk cache if present
+
+        Returns:
+            (features, source): dict with 60 features and 'real' or 'simulated',
+            or (None, None) if extraction failed
+        """
+        cache_path = self._cache_path(address, blockchain) if self.use_cache else None
+        if cache_path is not None:
+            cached = self._read_cache(cache_path)
+            if cached is not None:
+                return cached, 'real'
+
+        features, source = self._extract_features_uncached(address, blockchain, timeout)
+        if source == 'real' and cache_path is not None and _is_complete(features):
+            self._write_cache(cache_path, features)
+        return features, source
+
+    def _extract_features_uncached(self, address: str, blockchain: str, timeout: int) -> Dict:
         """
         Extract features for a single contract
 
@@ -51,49 +215,107 @@ class BatchFeatureExtractor:
             timeout: Timeout in seconds
 
         Returns:
-            Dict with 60 features or None if extraction failed
+            (features, source) as from extract_features_with_source, or
+            (None, None) if extraction failed
+        """
+        if ef_mod is None:
+            return self._extract_via_subprocess(address, blockchain, timeout)
+
+        try:
+            # Same input checks as extract_features.py's main()
+            normalized = ef_mod.validate_contract_address(address)
+            if blockchain.lower() not in ef_mod.BLOCKCHAIN_CONFIGS:
+                raise ValueError(f"Unsupported blockchain: {blockchain}")
+
+            # Worker thread only to enforce the timeout; a timed-out call is
+            # abandoned (not joined) rather than killed
+            pool = ThreadPoolExecutor(max_workers=1)
+            try:
+                return pool.submit(ef_mod.extract_features_with_source, normalized, blockchain).result(timeout=timeout)
+            finally:
+                pool.shutdown(wait=False)
+
+        except FuturesTimeoutError:
+            print(f"  ✗ {address} ({blockchain}): Timeout after {timeout}s")
+            return None, None
+        except Exception as e:
+            print(f"  ✗ {address} ({blockchain}): {e}")
+            return None, None
+
+    def _extract_via_subprocess(self, address: str, blockchain: str, timeout: int) -> Dict:
+        """Run extract_features.py (used when it can't be imported)
+
+        Sends one request through its --stdio mode, which also reports whether
+        the features are real or a simulated fallback
         """
         try:
             # Run the feature extraction script
-            cmd = [sys.executable, str(self.extract_script), address, blockchain]
+            cmd = [sys.executable, str(self.extract_script), '--stdio']
+            request = json.dumps({'id': 0, 'contract_address': address, 'blockchain': blockchain})
             result = subprocess.run(
                 cmd,
+                input=request + '\n',
                 capture_output=True,
                 text=True,
                 timeout=timeout
             )
 
-            if result.returncode == 0:
-                # Parse JSON output
-                output = result.stdout.strip()
-                features = json.loads(output)
-                return features
-            else:
+            if result.returncode != 0:
                 print(f"  ✗ {address} ({blockchain}): {result.stderr[:100]}")
-                return None
+                return None, None
+
+            # Parse JSON output
+            response = json.loads(result.stdout.strip())
+            if 'error' in response:
+                print(f"  ✗ {address} ({blockchain}): {response['error'][:100]}")
+                return None, None
+            return response['features'], response['source']
 
         except subprocess.TimeoutExpired:
             print(f"  ✗ {address} ({blockchain}): Timeout after {timeout}s")
-            return None
+            return None, None
         except json.JSONDecodeError as e:
             print(f"  ✗ {address} ({blockchain}): Invalid JSON - {e}")
-            return None
+            return None, None
         except Exception as e:
             print(f"  ✗ {address} ({blockchain}): {e}")
-            return None
+            return None, None
 
-    def process_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+    def process_batch(self, df: pd.DataFrame) -> int:
         """
         Process a batch of contracts to extract features
 
+        Each successful row is written to output_csv as soon as it completes,
+        so memory stays flat and a crash keeps everything written so far.
+        Written (blockchain, address) pairs are checkpointed to progress_file
+        every 10 rows, after flushing and fsyncing the CSV. A restart repairs
+        the partial output, skips every pair already in it and appends the
+        rest instead of rewriting it.
+
         Args:
             df: DataFrame with columns: address, blockchain, label
 
         Returns:
-            DataFrame with features + metadata
+            Number of contracts in output_csv, including resumed rows
         """
-        results = []
+        done = set()
+        if self.progress_file.exists() and self.output_csv.exists():
+            with open(self.progress_file) as f:
+                checkpointed = len(json.load(f))
+            done = self._recover_partial_output()
+            df = df[[key not in done for key in zip(df['blockchain'], df['address'])]]
+            print(f"\nResuming: {len(done)} contracts already in {self.output_csv} "
+                  f"({max(0, len(done) - checkpointed)} written after the last checkpoint)")
+        resumed = len(done)
+
         total = len(df)
+        out_file = None
+        writer = None
+
+        if total == 0:
+            print("Nothing left to extract")
+            self.progress_file.unlink(missing_ok=True)
+            return resumed
 
         print(f"\nExtracting features for {total} contracts...")
         print(f"This may take a while (~{total * 30 / 60:.1f} minutes estimated)\n")
@@ -101,46 +323,90 @@ class BatchFeatureExtractor:
         start_time = time.time()
         successful = 0
         failed = 0
-
-        # Process in batches with progress tracking
-        for idx, row in df.iterrows():
-            address = row['address']
-            blockchain = row['blockchain']
-            label = row['label']
-
-            print(f"[{idx + 1}/{total}] Processing {address} ({blockchain})...")
-
-            features = self.extract_features_for_contract(address, blockchain)
-
-            if features:
-                # Combine features with metadata
-                result = {
-                    'address': address,
-                    'blockchain': blockchain,
-                    'label': label,
-                    'name': row.get('name', 'Unknown'),
-                    'source': row.get('source', 'unknown'),
-                    **features  # Merge all 60 features
+        finished = False
+
+        # Contracts are independent (pure RPC work), so fan them out over a
+        # process pool; one worker keeps the plain sequential loop
+        parallel = self.max_workers > 1
+        with (ProcessPoolExecutor(max_workers=self.max_workers) if parallel else nullcontext()) as executor:
+            if parallel:
+                futures = {
+                    executor.submit(self.extract_features_for_contract, row.address, row.blockchain): row
+                    for row in df.itertuples(index=False)
                 }
-                results.append(result)
-                successful += 1
-                print(f"  ✓ Success ({successful}/{total})")
+                completed = (
+                    (futures[fut], _result_or_failure(futures[fut], fut.result))
+                    for fut in as_completed(futures)
+                )
             else:
-                failed += 1
-                print(f"  ✗ Failed ({failed}/{total})")
-
-            # Progress update every 10 contracts
-            if (idx + 1) % 10 == 0:
-                elapsed = time.time() - start_time
-                rate = (idx + 1) / elapsed
-                remaining = (total - idx - 1) / rate if rate > 0 else 0
-                print(f"\n  Progress: {idx + 1}/{total} ({100 * (idx + 1) / total:.1f}%)")
-                print(f"  Success rate: {100 * successful / (idx + 1):.1f}%")
-                print(f"  Time elapsed: {elapsed / 60:.1f} min")
-                print(f"  Time remaining: {remaining / 60:.1f} min\n")
-
-        # Create results DataFrame
-        results_df = pd.DataFrame(results)
+                completed = (
+                    (row, _result_or_failure(
+                        row, partial(self.extract_features_for_contract, row.address, row.blockchain)))
+                    for row in df.itertuples(index=False)
+                )
+
+            pbar = tqdm(completed, total=total, desc='extract', unit='contract')
+            try:
+                for row, (features, feature_source) in pbar:
+                    unknown = features.keys() - EXPECTED_FEATURES_SET if features else ()
+                    if unknown:
+                        # Extractor and schema disagree; don't drop columns silently
+                        print(f"  ✗ {row.address} ({row.blockchain}): features not in schema: {sorted(unknown)}")
+                        features = None
+
+                    if features:
+                        # Combine features with metadata
+                        result = {
+                            'address': row.address,
+                            'blockchain': row.blockchain,
+                            'label': row.label,
+                            'name': getattr(row, 'name', 'Unknown'),
+                            'source': getattr(row, 'source', 'unknown'),
+                            'feature_source': feature_source,  # real or simulated fallback
+                            **features  # Merge all 60 features
+                        }
+
+                        # Columns are fixed by the schema (missing features are
+                        # left blank); opened lazily so a run with no successes
+                        # leaves any previous output alone
+                        if writer is None:
+                            if done:
+                                # Resume: only append to a file with the same columns
+                                with open(self.output_csv, newline='') as f:
+                                    header = next(csv.reader(f))
+                                if tuple(header) != OUTPUT_COLUMNS:
+                                    raise ValueError(
+                                        f"{self.output_csv} has different columns than the feature schema; "
+                                        f"delete it and {self.progress_file} to start over")
+                                out_file = open(self.output_csv, 'a', newline='')
+                                writer = csv.DictWriter(out_file, fieldnames=OUTPUT_COLUMNS)
+                            else:
+                                out_file = open(self.output_csv, 'w', newline='')
+                                writer = csv.DictWriter(out_file, fieldnames=OUTPUT_COLUMNS)
+                                writer.writeheader()
+                        writer.writerow(result)
+
+                        successful += 1
+                        done.add((row.blockchain, row.address))
+                        # Checkpoint only what is durably on disk, 10 rows at a time
+                        if successful % 10 == 0:
+                            out_file.flush()
+                            os.fsync(out_file.fileno())
+                            self._write_progress(done)
+                    else:
+                        failed += 1
+
+                    pbar.set_postfix(ok=successful, fail=failed, refresh=False)
+                finished = True
+            finally:
+                pbar.close()
+                if out_file is not None:
+                    out_file.close()
+                if finished:
+                    # Every row was attempted; a fresh run starts over (the cache makes that cheap)
+                    self.progress_file.unlink(missing_ok=True)
+                elif out_file is not None:
+                    self._write_progress(done)
 
         print("\n" + "=" * 70)
         print("Extraction Summary")
@@ -150,7 +416,7 @@ class BatchFeatureExtractor:
         print(f"Failed: {failed} ({100 * failed / total:.1f}%)")
         print(f"Total time: {(time.time() - start_time) / 60:.1f} minutes")
 
-        return results_df
+        return resumed + successful
 
     def validate_features(self, df: pd.DataFrame) -> bool:
         """
@@ -162,33 +428,10 @@ class BatchFeatureExtractor:
         Returns:
             True if valid, False otherwise
         """
-        # Expected 60 features
-        expected_features = [
-            'hasOwnershipTransfer', 'hasRenounceOwnership', 'ownerBalance', 'ownerTransactionCount',
-            'multipleOwners', 'ownershipChangedRecently', 'ownerContractAge', 'ownerIsContract',
-            'ownerBlacklisted', 'ownerVerified',
-            'hasLiquidityLock', 'liquidityPoolSize', 'liquidityRatio', 'hasUniswapV2',
-            'hasPancakeSwap', 'liquidityLockedDays', 'liquidityProvidedByOwner', 'multiplePoolsExist',
-            'poolCreatedRecently', 'lowLiquidityWarning', 'rugpullHistoryOnDEX', 'slippageTooHigh',
-            'holderCount', 'holderConcentration', 'top10HoldersPercent', 'averageHoldingTime',
-            'suspiciousHolderPatterns', 'whaleCount', 'holderGrowthRate', 'dormantHolders',
-            'newHoldersSpiking', 'sellingPressure',
-            'hasHiddenMint', 'hasPausableTransfers', 'hasBlacklist', 'hasWhitelist',
-            'hasTimelocks', 'complexityScore', 'hasProxyPattern', 'isUpgradeable',
-            'hasExternalCalls', 'hasSelfDestruct', 'hasDelegateCall', 'hasInlineAssembly',
-            'verifiedContract', 'auditedByFirm', 'openSourceCode',
-            'avgDailyTransactions', 'transactionVelocity', 'uniqueInteractors', 'suspiciousPatterns',
-            'highFailureRate', 'gasOptimized', 'flashloanInteractions', 'frontRunningDetected',
-            'contractAge', 'lastActivityDays', 'creationBlock', 'deployedDuringBullMarket',
-            'launchFairness'
-        ]
 
         print("\nValidating features...")
 
-        missing_features = []
-        for feature in expected_features:
-            if feature not in df.columns:
-                missing_features.append(feature)
+        missing_features = sorted(EXPECTED_FEATURES_SET.difference(df.columns))
 
         if missing_features:
             print(f"  ✗ Missing {len(missing_features)} features:")
@@ -198,12 +441,12 @@ class BatchFeatureExtractor:
                 print(f"    ... and {len(missing_features) - 10} more")
             return False
 
-        print(f"  ✓ All {len(expected_features)} features present")
+        print(f"  ✓ All {len(EXPECTED_FEATURES)} features present")
 
-        # Check for missing values
-        missing_counts = df[expected_features].isnull().sum()
-        if missing_counts.sum() > 0:
-            print(f"  ⚠ Found missing values in {missing_counts[missing_counts > 0].count()} features")
+        # Check for missing values (one 2-D NumPy reduction)
+        null_mask = df.reindex(columns=EXPECTED_FEATURES).isna().to_numpy()
+        if null_mask.any():
+            print(f"  ⚠ Found missing values in {int(null_mask.any(axis=0).sum())} features")
             print("    These will be filled with 0 during training")
 
         return True
@@ -218,17 +461,23 @@ class BatchFeatureExtractor:
         print(f"\nLabel distribution:")
         print(df['label'].value_counts())
 
-        # Process batch
-        results_df = self.process_batch(df)
+        # Process batch (streams rows to output_csv)
+        written = self.process_batch(df)
 
         # Validate features
-        if len(results_df) > 0:
+        if written > 0:
+            results_df = pd.read_csv(self.output_csv, dtype=FEATURE_DTYPES)
             self.validate_features(results_df)
+            print(f"\n  ✓ Saved {len(results_df)} contracts with features to {self.output_csv}")
 
-            # Save results
-            print(f"\nSaving results to {self.output_csv}...")
-            results_df.to_csv(self.output_csv, index=False)
-            print(f"  ✓ Saved {len(results_df)} contracts with features")
+            if self.output_format in ("parquet", "both"):
+                try:
+                    results_df.to_parquet(self.output_parquet, compression='zstd', index=False)
+                    print(f"  ✓ Wrote {self.output_parquet}")
+                    if self.output_format == "parquet":
+                        self.output_csv.unlink()
+                except ImportError as e:
+                    print(f"  ⚠ Parquet output needs pyarrow ({e}); kept CSV only")
 
             # Generate summary
             print("\n" + "=" * 70)
@@ -249,13 +498,22 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Batch feature extraction for rug pull detection")
     parser.add_argument("input_csv", help="CSV file with addresses (columns: address, blockchain, label)")
     parser.add_argument("--output", "-o", help="Output CSV file (default: features_extracted.csv)")
-    parser.add_argument("--workers", "-w", type=int, default=1, help="Max parallel workers (default: 1)")
+    default_workers = min(8, os.cpu_count() or 1)
+    parser.add_argument("--workers", "-w", type=int, default=default_workers,
+                        help=f"Max parallel worker processes, 1 = sequential (default: {default_workers})")
+    parser.add_argument("--cache-dir", help="Feature cache directory (default: feature_cache/ next to input)")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-extract, ignore and skip the cache")
+    parser.add_argument("--format", choices=["csv", "parquet", "both"], default="csv",
+                        help="Output format (default: csv)")
 
     args = parser.parse_args()
 
     extractor = BatchFeatureExtractor(
         input_csv=args.input_csv,
         output_csv=args.output,
-        max_workers=args.workers
+        max_workers=args.workers,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        output_format=args.format
     )
     extractor.run()
@@ -1,252 +1,335 @@
 #!/usr/bin/env python3
 """
 RugDetector Model Training Pipeline
-Trains a RandomForest classifier to detect rug pulls from smart contract features
+Trains a gradient-boosted tree classifier (or a RandomForest, with --model rf)
+to detect rug pulls from smart contract features
 """
 
+import hashlib
+import inspect
 import json
+import operator
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
+from joblib import Memory, Parallel, delayed
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score, precision_recall_fscore_support
-from skl2onnx import convert_sklearn
-from skl2onnx.common.data_types import FloatTensorType
 import sys
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'model'))
+from optimize_onnx import optimize_onnx
+from feature_schema import FEATURE_NAMES as FEATURE_ORDER  # must match order in rugDetector.js
+
+# Generated data and fitted models, keyed by a hash of the call arguments;
+# a re-run with the same settings skips straight to evaluation and export.
+# The generated data is also keyed by _DATA_SPEC, so edits to the tier
+# defaults or the generator code invalidate it (and, through new arrays, the fit)
+_memory = Memory(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'), verbose=0)
+
+_FEATURE_GETTER = operator.itemgetter(*FEATURE_ORDER)  # dict -> tuple in FEATURE_ORDER
+# One float32 field per feature; viewing a C-contiguous (n, 60) block with it
+# gives named column access without index lookups or copies
+FEATURE_DTYPE = np.dtype([(name, np.float32) for name in FEATURE_ORDER])
+
+# Per-tier values for every feature the generator doesn't randomize
+TIER_DEFAULTS = {
+    'low': {
+        'hasOwnershipTransfer': 1, 'hasRenounceOwnership': 1, 'ownerBalance': 0.1,
+        'ownerTransactionCount': 20, 'multipleOwners': 0, 'ownershipChangedRecently': 0,
+        'ownerContractAge': 180, 'ownerIsContract': 0, 'ownerBlacklisted': 0, 'ownerVerified': 1,
+        'hasLiquidityLock': 1, 'liquidityPoolSize': 100000, 'liquidityRatio': 0.7,
+        'hasUniswapV2': 1, 'hasPancakeSwap': 0, 'liquidityLockedDays': 365,
+        'liquidityProvidedByOwner': 0.1, 'multiplePoolsExist': 1, 'poolCreatedRecently': 0,
+        'lowLiquidityWarning': 0, 'rugpullHistoryOnDEX': 0, 'slippageTooHigh': 0,
+        'holderCount': 2000, 'holderConcentration': 0.2, 'top10HoldersPercent': 0.3,
+        'averageHoldingTime': 60, 'suspiciousHolderPatterns': 0, 'whaleCount': 1,
+        'holderGrowthRate': 0.2, 'dormantHolders': 0.2, 'newHoldersSpiking': 0, 'sellingPressure': 0.2,
+        'hasHiddenMint': 0, 'hasPausableTransfers': 0, 'hasBlacklist': 0, 'hasWhitelist': 0,
+        'hasTimelocks': 1, 'complexityScore': 0.3, 'hasProxyPattern': 0, 'isUpgradeable': 0,
+        'hasExternalCalls': 1, 'hasSelfDestruct': 0, 'hasDelegateCall': 0, 'hasInlineAssembly': 0,
+        'verifiedContract': 1, 'auditedByFirm': 1, 'openSourceCode': 1,
+        'avgDailyTransactions': 50, 'transactionVelocity': 0.2, 'uniqueInteractors': 1000,
+        'suspiciousPatterns': 0, 'highFailureRate': 0, 'gasOptimized': 1,
+        'flashloanInteractions': 0, 'frontRunningDetected': 0,
+        'contractAge': 180, 'lastActivityDays': 1, 'creationBlock': 18500000,
+        'deployedDuringBullMarket': 0, 'launchFairness': 0.8
+    },
+    'medium': {
+        'hasOwnershipTransfer': 1, 'hasRenounceOwnership': 0, 'ownerBalance': 0.4,
+        'ownerTransactionCount': 100, 'multipleOwners': 0, 'ownershipChangedRecently': 0,
+        'ownerContractAge': 45, 'ownerIsContract': 0, 'ownerBlacklisted': 0, 'ownerVerified': 0,
+        'hasLiquidityLock': 0, 'liquidityPoolSize': 20000, 'liquidityRatio': 0.4,
+        'hasUniswapV2': 1, 'hasPancakeSwap': 0, 'liquidityLockedDays': 90,
+        'liquidityProvidedByOwner': 0.5, 'multiplePoolsExist': 0, 'poolCreatedRecently': 1,
+        'lowLiquidityWarning': 0, 'rugpullHistoryOnDEX': 0, 'slippageTooHigh': 0,
+        'holderCount': 200, 'holderConcentration': 0.5, 'top10HoldersPercent': 0.6,
+        'averageHoldingTime': 14, 'suspiciousHolderPatterns': 0, 'whaleCount': 5,
+        'holderGrowthRate': 0.8, 'dormantHolders': 0.4, 'newHoldersSpiking': 0, 'sellingPressure': 0.5,
+        'hasHiddenMint': 0, 'hasPausableTransfers': 1, 'hasBlacklist': 1, 'hasWhitelist': 0,
+        'hasTimelocks': 0, 'complexityScore': 0.6, 'hasProxyPattern': 1, 'isUpgradeable': 1,
+        'hasExternalCalls': 1, 'hasSelfDestruct': 0, 'hasDelegateCall': 1, 'hasInlineAssembly': 1,
+        'verifiedContract': 1, 'auditedByFirm': 0, 'openSourceCode': 1,
+        'avgDailyTransactions': 300, 'transactionVelocity': 0.6, 'uniqueInteractors': 150,
+        'suspiciousPatterns': 0, 'highFailureRate': 0, 'gasOptimized': 0,
+        'flashloanInteractions': 0, 'frontRunningDetected': 0,
+        'contractAge': 30, 'lastActivityDays': 0.5, 'creationBlock': 18800000,
+        'deployedDuringBullMarket': 1, 'launchFairness': 0.5
+    },
+    'high': {
+        'hasOwnershipTransfer': 1, 'hasRenounceOwnership': 0, 'ownerBalance': 0.9,
+        'ownerTransactionCount': 300, 'multipleOwners': 0, 'ownershipChangedRecently': 1,
+        'ownerContractAge': 3, 'ownerIsContract': 0, 'ownerBlacklisted': 1, 'ownerVerified': 0,
+        'hasLiquidityLock': 0, 'liquidityPoolSize': 1000, 'liquidityRatio': 0.1,
+        'hasUniswapV2': 0, 'hasPancakeSwap': 1, 'liquidityLockedDays': 0,
+        'liquidityProvidedByOwner': 0.95, 'multiplePoolsExist': 0, 'poolCreatedRecently': 1,
+        'lowLiquidityWarning': 1, 'rugpullHistoryOnDEX': 0, 'slippageTooHigh': 1,
+        'holderCount': 30, 'holderConcentration': 0.9, 'top10HoldersPercent': 0.95,
+        'averageHoldingTime': 2, 'suspiciousHolderPatterns': 1, 'whaleCount': 10,
+        'holderGrowthRate': 2.0, 'dormantHolders': 0.8, 'newHoldersSpiking': 1, 'sellingPressure': 0.8,
+        'hasHiddenMint': 1, 'hasPausableTransfers': 1, 'hasBlacklist': 1, 'hasWhitelist': 0,
+        'hasTimelocks': 0, 'complexityScore': 0.9, 'hasProxyPattern': 1, 'isUpgradeable': 1,
+        'hasExternalCalls': 1, 'hasSelfDestruct': 1, 'hasDelegateCall': 1, 'hasInlineAssembly': 1,
+        'verifiedContract': 0, 'auditedByFirm': 0, 'openSourceCode': 0,
+        'avgDailyTransactions': 1500, 'transactionVelocity': 1.5, 'uniqueInteractors': 50,
+        'suspiciousPatterns': 1, 'highFailureRate': 1, 'gasOptimized': 0,
+        'flashloanInteractions': 1, 'frontRunningDetected': 1,
+        'contractAge': 5, 'lastActivityDays': 0.1, 'creationBlock': 18900000,
+        'deployedDuringBullMarket': 1, 'launchFairness': 0.2
+    },
+}
+
+# The same defaults as float32 rows in FEATURE_ORDER
+TIER_TEMPLATES = {
+    level: np.array(_FEATURE_GETTER(defaults), dtype=np.float32)
+    for level, defaults in TIER_DEFAULTS.items()
+}
+
+
+def _generate_tier(rng, X, risk_level):
+    """
+    Fill X, a C-contiguous (n, 60) float32 block, with samples of one risk tier
+
+    Rows start as the tier template; the key features are then drawn one
+    column at a time, so each distribution is a single vectorized RNG call
+    (binary flags are Bernoulli draws: binomial(1, p_true)).
+    """
+    n = len(X)
+    X[:] = TIER_TEMPLATES[risk_level]
+    # Zero-copy record view of the same rows: rec['name'] is that feature's column
+    rec = X.view(FEATURE_DTYPE)[:, 0]
+
+    if risk_level == 'low':
+        # Legitimate projects: fixed-at-zero red flags come from the template
+        rec['ownerBalance'] = rng.uniform(0.0, 0.2, n)
+        rec['hasRenounceOwnership'] = rng.binomial(1, 0.7, n)
+        rec['ownerVerified'] = rng.binomial(1, 0.8, n)
+        rec['hasLiquidityLock'] = rng.binomial(1, 0.9, n)
+        rec['liquidityRatio'] = rng.uniform(0.5, 0.9, n)
+        rec['liquidityLockedDays'] = rng.uniform(180, 730, n)
+        rec['holderConcentration'] = rng.uniform(0.1, 0.3, n)
+        rec['top10HoldersPercent'] = rng.uniform(0.15, 0.4, n)
+        rec['holderCount'] = rng.uniform(1000, 10000, n)
+        rec['verifiedContract'] = rng.binomial(1, 0.9, n)
+        rec['auditedByFirm'] = rng.binomial(1, 0.6, n)
+        rec['contractAge'] = rng.uniform(90, 730, n)
+
+    elif risk_level == 'medium':
+        # Suspicious but not confirmed scams
+        rec['ownerBalance'] = rng.uniform(0.3, 0.6, n)
+        rec['hasRenounceOwnership'] = rng.binomial(1, 0.4, n)
+        rec['ownerVerified'] = rng.binomial(1, 0.3, n)
+        rec['hasLiquidityLock'] = rng.binomial(1, 0.5, n)
+        rec['liquidityRatio'] = rng.uniform(0.3, 0.6, n)
+        rec['liquidityLockedDays'] = rng.uniform(30, 180, n)
+        rec['holderConcentration'] = rng.uniform(0.4, 0.6, n)
+        rec['top10HoldersPercent'] = rng.uniform(0.5, 0.7, n)
+        rec['holderCount'] = rng.uniform(100, 1000, n)
+        rec['hasHiddenMint'] = rng.binomial(1, 0.3, n)
+        rec['verifiedContract'] = rng.binomial(1, 0.5, n)
+        rec['auditedByFirm'] = rng.binomial(1, 0.2, n)
+        rec['contractAge'] = rng.uniform(14, 90, n)
+
+    else:  # high risk
+        # Likely rug pulls: fixed red flags (no lock, unverified owner, ...) come from the template
+        rec['ownerBalance'] = rng.uniform(0.7, 0.99, n)
+        rec['ownerBlacklisted'] = rng.binomial(1, 0.3, n)
+        rec['liquidityRatio'] = rng.uniform(0.05, 0.3, n)
+        rec['liquidityLockedDays'] = rng.uniform(0, 30, n)
+        rec['holderConcentration'] = rng.uniform(0.7, 0.95, n)
+        rec['top10HoldersPercent'] = rng.uniform(0.8, 0.99, n)
+        rec['holderCount'] = rng.uniform(10, 100, n)
+        rec['hasHiddenMint'] = rng.binomial(1, 0.7, n)
+        rec['verifiedContract'] = rng.binomial(1, 0.1, n)
+        rec['hasSelfDestruct'] = rng.binomial(1, 0.2, n)
+        rec['contractAge'] = rng.uniform(0.1, 14, n)
+
+
 def generate_synthetic_training_data(n_samples=5000):
     """
     Generate synthetic training data for demonstration
     In production, this would load real labeled data from a database
 
     Returns:
-        X: Feature matrix (n_samples, 60)
+        X: Feature matrix (n_samples, 60), float32
         y: Labels (n_samples,) - 0=low_risk, 1=medium_risk, 2=high_risk
     """
     print(f"Generating {n_samples} synthetic training samples...")
 
-    np.random.seed(42)
-
     # Distribution: 30% low risk, 30% medium risk, 40% high risk
     n_low = int(n_samples * 0.3)
     n_medium = int(n_samples * 0.3)
     n_high = n_samples - n_low - n_medium
 
-    X = []
-    y = []
-
-    # Generate LOW RISK samples (legitimate projects)
-    for _ in range(n_low):
-        features = {
-            # Ownership features - good patterns
-            'ownerBalance': np.random.uniform(0.0, 0.2),
-            'hasRenounceOwnership': np.random.choice([0, 1], p=[0.3, 0.7]),
-            'ownerBlacklisted': 0,
-            'ownerVerified': np.random.choice([0, 1], p=[0.2, 0.8]),
-
-            # Liquidity features - strong liquidity
-            'hasLiquidityLock': np.random.choice([0, 1], p=[0.1, 0.9]),
-            'liquidityRatio': np.random.uniform(0.5, 0.9),
-            'liquidityLockedDays': np.random.uniform(180, 730),
-            'lowLiquidityWarning': 0,
-
-            # Holder features - distributed ownership
-            'holderConcentration': np.random.uniform(0.1, 0.3),
-            'top10HoldersPercent': np.random.uniform(0.15, 0.4),
-            'holderCount': np.random.uniform(1000, 10000),
-
-            # Code features - verified and safe
-            'hasHiddenMint': 0,
-            'verifiedContract': np.random.choice([0, 1], p=[0.1, 0.9]),
-            'auditedByFirm': np.random.choice([0, 1], p=[0.4, 0.6]),
-            'hasSelfDestruct': 0,
-
-            # Time features - mature project
-            'contractAge': np.random.uniform(90, 730),
-        }
-        X.append(generate_full_feature_vector(features, risk_level='low'))
-        y.append(0)  # Low risk
-
-    # Generate MEDIUM RISK samples (suspicious but not confirmed scams)
-    for _ in range(n_medium):
-        features = {
-            # Ownership features - some concerns
-            'ownerBalance': np.random.uniform(0.3, 0.6),
-            'hasRenounceOwnership': np.random.choice([0, 1], p=[0.6, 0.4]),
-            'ownerVerified': np.random.choice([0, 1], p=[0.7, 0.3]),
-
-            # Liquidity features - moderate
-            'hasLiquidityLock': np.random.choice([0, 1], p=[0.5, 0.5]),
-            'liquidityRatio': np.random.uniform(0.3, 0.6),
-            'liquidityLockedDays': np.random.uniform(30, 180),
-
-            # Holder features - moderate concentration
-            'holderConcentration': np.random.uniform(0.4, 0.6),
-            'top10HoldersPercent': np.random.uniform(0.5, 0.7),
-            'holderCount': np.random.uniform(100, 1000),
-
-            # Code features - some red flags
-            'hasHiddenMint': np.random.choice([0, 1], p=[0.7, 0.3]),
-            'verifiedContract': np.random.choice([0, 1], p=[0.5, 0.5]),
-            'auditedByFirm': np.random.choice([0, 1], p=[0.8, 0.2]),
-
-            # Time features - relatively new
-            'contractAge': np.random.uniform(14, 90),
-        }
-        X.append(generate_full_feature_vector(features, risk_level='medium'))
-        y.append(1)  # Medium risk
-
-    # Generate HIGH RISK samples (likely rug pulls)
-    for _ in range(n_high):
-        features = {
-            # Ownership features - major red flags
-            'ownerBalance': np.random.uniform(0.7, 0.99),
-            'hasRenounceOwnership': 0,
-            'ownerBlacklisted': np.random.choice([0, 1], p=[0.7, 0.3]),
-            'ownerVerified': 0,
-
-            # Liquidity features - poor/no liquidity
-            'hasLiquidityLock': 0,
-            'liquidityRatio': np.random.uniform(0.05, 0.3),
-            'liquidityLockedDays': np.random.uniform(0, 30),
-            'lowLiquidityWarning': 1,
-
-            # Holder features - highly concentrated
-            'holderConcentration': np.random.uniform(0.7, 0.95),
-            'top10HoldersPercent': np.random.uniform(0.8, 0.99),
-            'holderCount': np.random.uniform(10, 100),
-
-            # Code features - multiple red flags
-            'hasHiddenMint': np.random.choice([0, 1], p=[0.3, 0.7]),
-            'verifiedContract': np.random.choice([0, 1], p=[0.9, 0.1]),
-            'auditedByFirm': 0,
-            'hasSelfDestruct': np.random.choice([0, 1], p=[0.8, 0.2]),
-
-            # Time features - very new
-            'contractAge': np.random.uniform(0.1, 14),
-        }
-        X.append(generate_full_feature_vector(features, risk_level='high'))
-        y.append(2)  # High risk
-
-    return np.array(X), np.array(y)
-
-
-def generate_full_feature_vector(key_features, risk_level='low'):
+    # One contiguous buffer; each tier fills its own row block in place
+    X = np.empty((n_samples, 60), dtype=np.float32)
+    y = np.empty(n_samples, dtype=np.int32)
+
+    tiers = []
+    start = 0
+    for label, (n, risk_level) in enumerate([(n_low, 'low'), (n_medium, 'medium'), (n_high, 'high')]):
+        tiers.append((slice(start, start + n), risk_level))
+        y[start:start + n] = label  # 0=low, 1=medium, 2=high
+        start += n
+
+    # Tiers are independent: one thread each (NumPy's RNG and copies release
+    # the GIL, and threads write straight into X), each with its own
+    # statistically independent stream so the result is still reproducible
+    seeds = np.random.SeedSequence(42).spawn(len(tiers))
+    Parallel(n_jobs=len(tiers), prefer='threads')(
+        delayed(_generate_tier)(np.random.default_rng(seed), X[rows], risk_level)
+        for seed, (rows, risk_level) in zip(seeds, tiers)
+    )
+
+    return X, y
+
+
+# Hash of everything the generated data depends on besides n_samples
+_DATA_SPEC = hashlib.sha256(repr((
+    FEATURE_ORDER,
+    sorted((level, sorted(defaults.items())) for level, defaults in TIER_DEFAULTS.items()),
+    inspect.getsource(_generate_tier),
+    inspect.getsource(generate_synthetic_training_data),
+)).encode()).hexdigest()
+
+
+@_memory.cache
+def _cached_training_data(n_samples, spec):
+    """generate_synthetic_training_data, cached per n_samples and spec (_DATA_SPEC)"""
+    return generate_synthetic_training_data(n_samples=n_samples)
+
+
+@_memory.cache
+def _fit(estimator, X, y):
+    """Fit estimator; cached on its parameters and the exact training arrays"""
+    return estimator.fit(X, y)
+
+
+def build_model(model_type='hgb'):
     """
-    Generate a complete 60-feature vector from key features
+    Create the untrained classifier
 
-    Args:
-        key_features: Dict of important features
-        risk_level: 'low', 'medium', or 'high'
+    'hgb' bins each feature into at most 64 uint8 buckets once up front, so
+    split finding scans histograms instead of sorted float columns; it
+    trains and predicts much faster than the forest on this data.
+    'rf' is a RandomForest.
+    """
+    if model_type == 'rf':
+        # 5000x60 doesn't need 100 depth-20 trees; each tree also sees a
+        # half-size bootstrap, which cuts fit time and the ONNX graph size
+        return RandomForestClassifier(
+            n_estimators=50,
+            max_depth=10,
+            min_samples_split=5,
+            min_samples_leaf=5,
+            max_features='sqrt',
+            bootstrap=True,
+            max_samples=0.5,
+            oob_score=True,  # free generalization estimate from the rows each tree didn't see
+            class_weight='balanced_subsample',  # reweight the 30/30/40 classes per bootstrap
+            random_state=42,
+            n_jobs=-1
+        )
+
+    return HistGradientBoostingClassifier(
+        max_iter=200,
+        max_depth=8,
+        learning_rate=0.1,
+        max_bins=64,
+        early_stopping=True,
+        scoring='accuracy',  # early-stopping split doubles as the generalization estimate
+        random_state=42
+    )
+
+
+def check_onnx_accuracy(onnx_path, X_test, y_test, reference_accuracy, tolerance=0.005):
+    """
+    Score the exported graph on the test split and compare with sklearn
+
+    The TreeEnsemble op evaluates thresholds in float32, so a split that
+    lands between two float32 values can flip; more than `tolerance` lost
+    means the export is not faithful.
 
     Returns:
-        List of 60 numeric values
+        ONNX test accuracy, or None if onnxruntime is not installed
     """
-    # Set defaults based on risk level
-    if risk_level == 'low':
-        defaults = {
-            'hasOwnershipTransfer': 1, 'hasRenounceOwnership': 1, 'ownerBalance': 0.1,
-            'ownerTransactionCount': 20, 'multipleOwners': 0, 'ownershipChangedRecently': 0,
-            'ownerContractAge': 180, 'ownerIsContract': 0, 'ownerBlacklisted': 0, 'ownerVerified': 1,
-            'hasLiquidityLock': 1, 'liquidityPoolSize': 100000, 'liquidityRatio': 0.7,
-            'hasUniswapV2': 1, 'hasPancakeSwap': 0, 'liquidityLockedDays': 365,
-            'liquidityProvidedByOwner': 0.1, 'multiplePoolsExist': 1, 'poolCreatedRecently': 0,
-            'lowLiquidityWarning': 0, 'rugpullHistoryOnDEX': 0, 'slippageTooHigh': 0,
-            'holderCount': 2000, 'holderConcentration': 0.2, 'top10HoldersPercent': 0.3,
-            'averageHoldingTime': 60, 'suspiciousHolderPatterns': 0, 'whaleCount': 1,
-            'holderGrowthRate': 0.2, 'dormantHolders': 0.2, 'newHoldersSpiking': 0, 'sellingPressure': 0.2,
-            'hasHiddenMint': 0, 'hasPausableTransfers': 0, 'hasBlacklist': 0, 'hasWhitelist': 0,
-            'hasTimelocks': 1, 'complexityScore': 0.3, 'hasProxyPattern': 0, 'isUpgradeable': 0,
-            'hasExternalCalls': 1, 'hasSelfDestruct': 0, 'hasDelegateCall': 0, 'hasInlineAssembly': 0,
-            'verifiedContract': 1, 'auditedByFirm': 1, 'openSourceCode': 1,
-            'avgDailyTransactions': 50, 'transactionVelocity': 0.2, 'uniqueInteractors': 1000,
-            'suspiciousPatterns': 0, 'highFailureRate': 0, 'gasOptimized': 1,
-            'flashloanInteractions': 0, 'frontRunningDetected': 0,
-            'contractAge': 180, 'lastActivityDays': 1, 'creationBlock': 18500000,
-            'deployedDuringBullMarket': 0, 'launchFairness': 0.8
-        }
-    elif risk_level == 'medium':
-        defaults = {
-            'hasOwnershipTransfer': 1, 'hasRenounceOwnership': 0, 'ownerBalance': 0.4,
-            'ownerTransactionCount': 100, 'multipleOwners': 0, 'ownershipChangedRecently': 0,
-            'ownerContractAge': 45, 'ownerIsContract': 0, 'ownerBlacklisted': 0, 'ownerVerified': 0,
-            'hasLiquidityLock': 0, 'liquidityPoolSize': 20000, 'liquidityRatio': 0.4,
-            'hasUniswapV2': 1, 'hasPancakeSwap': 0, 'liquidityLockedDays': 90,
-            'liquidityProvidedByOwner': 0.5, 'multiplePoolsExist': 0, 'poolCreatedRecently': 1,
-            'lowLiquidityWarning': 0, 'rugpullHistoryOnDEX': 0, 'slippageTooHigh': 0,
-            'holderCount': 200, 'holderConcentration': 0.5, 'top10HoldersPercent': 0.6,
-            'averageHoldingTime': 14, 'suspiciousHolderPatterns': 0, 'whaleCount': 5,
-            'holderGrowthRate': 0.8, 'dormantHolders': 0.4, 'newHoldersSpiking': 0, 'sellingPressure': 0.5,
-            'hasHiddenMint': 0, 'hasPausableTransfers': 1, 'hasBlacklist': 1, 'hasWhitelist': 0,
-            'hasTimelocks': 0, 'complexityScore': 0.6, 'hasProxyPattern': 1, 'isUpgradeable': 1,
-            'hasExternalCalls': 1, 'hasSelfDestruct': 0, 'hasDelegateCall': 1, 'hasInlineAssembly': 1,
-            'verifiedContract': 1, 'auditedByFirm': 0, 'openSourceCode': 1,
-            'avgDailyTransactions': 300, 'transactionVelocity': 0.6, 'uniqueInteractors': 150,
-            'suspiciousPatterns': 0, 'highFailureRate': 0, 'gasOptimized': 0,
-            'flashloanInteractions': 0, 'frontRunningDetected': 0,
-            'contractAge': 30, 'lastActivityDays': 0.5, 'creationBlock': 18800000,
-            'deployedDuringBullMarket': 1, 'launchFairness': 0.5
-        }
-    else:  # high risk
-        defaults = {
-            'hasOwnershipTransfer': 1, 'hasRenounceOwnership': 0, 'ownerBalance': 0.9,
-            'ownerTransactionCount': 300, 'multipleOwners': 0, 'ownershipChangedRecently': 1,
-            'ownerContractAge': 3, 'ownerIsContract': 0, 'ownerBlacklisted': 1, 'ownerVerified': 0,
-            'hasLiquidityLock': 0, 'liquidityPoolSize': 1000, 'liquidityRatio': 0.1,
-            'hasUniswapV2': 0, 'hasPancakeSwap': 1, 'liquidityLockedDays': 0,
-            'liquidityProvidedByOwner': 0.95, 'multiplePoolsExist': 0, 'poolCreatedRecently': 1,
-            'lowLiquidityWarning': 1, 'rugpullHistoryOnDEX': 0, 'slippageTooHigh': 1,
-            'holderCount': 30, 'holderConcentration': 0.9, 'top10HoldersPercent': 0.95,
-            'averageHoldingTime': 2, 'suspiciousHolderPatterns': 1, 'whaleCount': 10,
-            'holderGrowthRate': 2.0, 'dormantHolders': 0.8, 'newHoldersSpiking': 1, 'sellingPressure': 0.8,
-            'hasHiddenMint': 1, 'hasPausableTransfers': 1, 'hasBlacklist': 1, 'hasWhitelist': 0,
-            'hasTimelocks': 0, 'complexityScore': 0.9, 'hasProxyPattern': 1, 'isUpgradeable': 1,
-            'hasExternalCalls': 1, 'hasSelfDestruct': 1, 'hasDelegateCall': 1, 'hasInlineAssembly': 1,
-            'verifiedContract': 0, 'auditedByFirm': 0, 'openSourceCode': 0,
-            'avgDailyTransactions': 1500, 'transactionVelocity': 1.5, 'uniqueInteractors': 50,
-            'suspiciousPatterns': 1, 'highFailureRate': 1, 'gasOptimized': 0,
-            'flashloanInteractions': 1, 'frontRunningDetected': 1,
-            'contractAge': 5, 'lastActivityDays': 0.1, 'creationBlock': 18900000,
-            'deployedDuringBullMarket': 1, 'launchFairness': 0.2
-        }
-
-    # Merge key features with defaults
-    merged = {**defaults, **key_features}
-
-    # Convert to ordered array (must match order in rugDetector.js)
-    feature_order = [
-        'hasOwnershipTransfer', 'hasRenounceOwnership', 'ownerBalance', 'ownerTransactionCount',
-        'multipleOwners', 'ownershipChangedRecently', 'ownerContractAge', 'ownerIsContract',
-        'ownerBlacklisted', 'ownerVerified',
-        'hasLiquidityLock', 'liquidityPoolSize', 'liquidityRatio', 'hasUniswapV2',
-        'hasPancakeSwap', 'liquidityLockedDays', 'liquidityProvidedByOwner', 'multiplePoolsExist',
-        'poolCreatedRecently', 'lowLiquidityWarning', 'rugpullHistoryOnDEX', 'slippageTooHigh',
-        'holderCount', 'holderConcentration', 'top10HoldersPercent', 'averageHoldingTime',
-        'suspiciousHolderPatterns', 'whaleCount', 'holderGrowthRate', 'dormantHolders',
-        'newHoldersSpiking', 'sellingPressure',
-        'hasHiddenMint', 'hasPausableTransfers', 'hasBlacklist', 'hasWhitelist',
-        'hasTimelocks', 'complexityScore', 'hasProxyPattern', 'isUpgradeable',
-        'hasExternalCalls', 'hasSelfDestruct', 'hasDelegateCall', 'hasInlineAssembly',
-        'verifiedContract', 'auditedByFirm', 'openSourceCode',
-        'avgDailyTransactions', 'transactionVelocity', 'uniqueInteractors', 'suspiciousPatterns',
-        'highFailureRate', 'gasOptimized', 'flashloanInteractions', 'frontRunningDetected',
-        'contractAge', 'lastActivityDays', 'creationBlock', 'deployedDuringBullMarket',
-        'launchFairness'
-    ]
-
-    return [merged[feature] for feature in feature_order]
-
-
-def train_model():
-    """Train the RandomForest model and export to ONNX"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("onnxruntime not available, skipping ONNX accuracy check")
+        return None
+
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    labels = session.run([session.get_outputs()[0].name],
+                         {input_name: np.ascontiguousarray(X_test, dtype=np.float32)})[0]
+    onnx_accuracy = accuracy_score(y_test, labels)
+
+    delta = reference_accuracy - onnx_accuracy
+    if delta > tolerance:
+        print(f"WARNING: ONNX accuracy {onnx_accuracy:.3f} is {delta:.3f} below sklearn's {reference_accuracy:.3f}")
+    else:
+        print(f"ONNX test accuracy: {onnx_accuracy:.3f} (sklearn: {reference_accuracy:.3f})")
+    return onnx_accuracy
+
+
+def export_treelite(model, libpath, parallel_comp=8):
+    """
+    Compile the fitted trees to a native shared library with treelite/tl2cgen
+
+    Each tree becomes straight-line C, so single-row predict skips the
+    generic tree walker. For Python-side scoring only: the API service
+    keeps loading the ONNX model. Load with tl2cgen.Predictor(libpath).
+
+    Returns:
+        libpath, or None if treelite/tl2cgen are not installed
+    """
+    try:
+        import treelite
+        import tl2cgen
+    except ImportError:
+        print("treelite/tl2cgen not available, skipping native model")
+        return None
+
+    tl_model = treelite.sklearn.import_model(model)
+    tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=libpath,
+                       params={'parallel_comp': parallel_comp})
+    print(f"Native model saved to: {libpath}")
+    return libpath
+
+
+def train_model(model_type='hgb', treelite=False):
+    """Train the tree model and export to ONNX (and optionally a treelite .so)"""
 
     print("=" * 60)
     print("RugDetector Model Training Pipeline")
     print("=" * 60)
 
     # Step 1: Generate training data
-    X, y = generate_synthetic_training_data(n_samples=5000)
+    X, y = _cached_training_data(5000, _DATA_SPEC)
+    # The tree fitters and the ONNX graph both work in float32; no-op if already float32
+    X = X.astype(np.float32, copy=False)
+    y = y.astype(np.int32, copy=False)
     print(f"\nDataset shape: {X.shape}")
     print(f"Class distribution: Low={np.sum(y==0)}, Medium={np.sum(y==1)}, High={np.sum(y==2)}")
 
@@ -254,20 +337,17 @@ def train_model():
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
+    # Both fitters scan one feature column at a time (RF split search, HGBT
+    # binning); column-major keeps those scans contiguous. Done after the
+    # split because fancy-indexing returns C-order
+    X_train = np.asfortranarray(X_train)
     print(f"Training samples: {len(X_train)}")
     print(f"Test samples: {len(X_test)}")
 
     # Step 3: Train model
-    print("\nTraining RandomForest classifier...")
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=20,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    )
-    model.fit(X_train, y_train)
+    model = build_model(model_type)
+    print(f"\nTraining {type(model).__name__}...")
+    model = _fit(model, X_train, y_train)
     print("Training complete!")
 
     # Step 4: Evaluate model
@@ -287,13 +367,17 @@ def train_model():
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred, target_names=['Low Risk', 'Medium Risk', 'High Risk']))
 
-    # Step 5: Cross-validation
-    print("\nPerforming 5-fold cross-validation...")
-    cv_scores = cross_val_score(model, X, y, cv=5, scoring='accuracy')
-    print(f"CV Scores: {cv_scores}")
-    print(f"Mean CV Accuracy: {cv_scores.mean():.3f} (+/- {cv_scores.std() * 2:.3f})")
+    # Step 5: Generalization estimate from the fit itself (no cross-validation refits)
+    if model_type == 'rf':
+        print(f"\nOut-of-bag accuracy: {model.oob_score_:.3f}")
+    else:
+        print(f"\nEarly-stopping validation accuracy: {model.validation_score_[-1]:.3f}")
+
+    # Step 6: Export to ONNX (imported here so data-gen callers don't load skl2onnx)
+    import onnx
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
 
-    # Step 6: Export to ONNX
     print("\n" + "=" * 60)
     print("Exporting to ONNX")
     print("=" * 60)
@@ -309,20 +393,37 @@ def train_model():
 
     # Save ONNX model
     onnx_path = os.path.join(os.path.dirname(__file__), '../model/rugdetector_v1.onnx')
-    with open(onnx_path, 'wb') as f:
-        f.write(onnx_model.SerializeToString())
+    onnx.save_model(onnx_model, onnx_path, save_as_external_data=False)
 
     print(f"ONNX model saved to: {onnx_path}")
     print(f"Model size: {os.path.getsize(onnx_path) / 1024:.1f} KB")
 
+    check_onnx_accuracy(onnx_path, X_test, y_test, accuracy)
+
+    # Bake ORT's graph optimizations into rugdetector_v1_opt.onnx; the API
+    # serves it (with optimization disabled) when it is newer than onnx_path
+    try:
+        optimize_onnx(onnx_path)
+    except ImportError:
+        print("onnxruntime not available, skipping optimized model")
+
+    if treelite:
+        export_treelite(model, os.path.join(os.path.dirname(__file__), '../model/rugdetector_v1.so'))
+
     # Step 7: Save metadata
+    if model_type == 'rf':
+        num_trees = len(model.estimators_)
+    else:
+        # One tree per class per boosting iteration (early stopping may cut iterations)
+        num_trees = model.n_iter_ * model.n_trees_per_iteration_
+
     metadata = {
         "model_name": "rugdetector_v1",
         "version": "1.0.0",
         "created_at": "2025-10-23",
-        "model_type": "RandomForestClassifier",
-        "num_trees": 100,
-        "max_depth": 20,
+        "model_type": type(model).__name__,
+        "num_trees": num_trees,
+        "max_depth": model.max_depth,
         "input_features": 60,
         "output_classes": 3,
         "classes": ["low_risk", "medium_risk", "high_risk"],
@@ -345,4 +446,13 @@ def train_model():
 
 
 if __name__ == '__main__':
-    train_model()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train RugDetector model on synthetic data")
+    parser.add_argument("--model", choices=("hgb", "rf"), default="hgb",
+                        help="hgb: HistGradientBoosting (default), rf: RandomForest")
+    parser.add_argument("--treelite", action="store_true",
+                        help="Also compile the trees to model/rugdetector_v1.so (needs treelite, tl2cgen, gcc)")
+
+    args = parser.parse_args()
+    train_model(model_type=args.model, treelite=args.treelite)
@@ -4,32 +4,103 @@ RugDetector Model Training on Real Data
 Trains a RandomForest classifier using real rug pull and legitimate token data
 """
 
+import hashlib
 import json
 import numpy as np
 import pandas as pd
+import joblib
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
-from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import StratifiedShuffleSplit, cross_validate, StratifiedKFold
 from sklearn.metrics import (
     classification_report, accuracy_score, precision_recall_fscore_support,
-    confusion_matrix, roc_auc_score, roc_curve
+    confusion_matrix
 )
 from skl2onnx import convert_sklearn
 from skl2onnx.common.data_types import FloatTensorType
-import matplotlib.pyplot as plt
-import seaborn as sns
 import sys
 import os
 from pathlib import Path
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'model'))
+from feature_schema import FEATURE_NAMES
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'  # multithreaded CSV parser
+except ImportError:
+    CSV_ENGINE = 'c'
+
+try:
+    import lz4  # noqa: F401
+    JOBLIB_COMPRESS = ('lz4', 3)  # much faster to load than zlib at a similar ratio
+except ImportError:
+    JOBLIB_COMPRESS = ('zlib', 3)
+
+def top_k_indices(values, k):
+    """Indices of the k largest values, largest first (partial sort: O(n + k log k))"""
+    k = min(k, len(values))
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top])]
+
+
+def downcast_double_initializers(onnx_model):
+    """
+    Rewrite any float64 initializers in the graph as float32, in place
+
+    The input is FloatTensorType and the runtime computes in float32, so
+    double constants only double their bytes on disk and at load time.
+
+    Returns:
+        Number of initializers converted
+    """
+    from onnx import TensorProto, numpy_helper
+
+    converted = 0
+    for init in onnx_model.graph.initializer:
+        if init.data_type == TensorProto.DOUBLE:
+            array = numpy_helper.to_array(init).astype(np.float32)
+            init.CopyFrom(numpy_helper.from_array(array, name=init.name))
+            converted += 1
+    return converted
+
+
+def check_onnx_parity(model, onnx_path, X, atol=1e-4):
+    """
+    Compare sklearn predict_proba with the exported graph's probabilities
+
+    Returns:
+        Max absolute difference, or None if onnxruntime is not installed
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("  ⚠ onnxruntime not available, skipping ONNX parity check")
+        return None
+
+    session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    onnx_proba = session.run(['probabilities'], {input_name: np.ascontiguousarray(X, dtype=np.float32)})[0]
+
+    max_diff = float(np.abs(model.predict_proba(X) - onnx_proba).max())
+    if max_diff > atol:
+        print(f"  ⚠ ONNX probabilities differ from sklearn by up to {max_diff:.2e}")
+    else:
+        print(f"  ✓ ONNX matches sklearn (max |Δp| = {max_diff:.2e})")
+    return max_diff
+
+
 class RealDataModelTrainer:
     """Train RandomForest model on real rug pull data"""
 
-    def __init__(self, features_csv: str):
+    def __init__(self, features_csv: str, n_estimators: int = 200, warm_start: bool = False):
         self.features_csv = Path(features_csv)
         self.model_dir = Path(__file__).parent.parent / "model"
         self.model_dir.mkdir(exist_ok=True)
+        self.n_estimators = n_estimators
+        # Grow the forest saved by the previous run instead of retraining it
+        self.warm_start = warm_start
+        self.forest_path = self.model_dir / "rugdetector_v2_real_forest.joblib"
 
         print("=" * 70)
         print("RugDetector Model Training on Real Data")
@@ -42,40 +113,40 @@ class RealDataModelTrainer:
 
         print("\n[1] Loading and preparing data...")
 
-        # Load CSV
-        df = pd.read_csv(self.features_csv)
+        # Feature columns in model input order (60 features)
+        feature_columns = list(FEATURE_NAMES)
+
+        # Load features (parquet output of extract_features_batch.py --format parquet, or CSV)
+        if self.features_csv.suffix == '.parquet':
+            df = pd.read_parquet(self.features_csv)
+        else:
+            df = pd.read_csv(
+                self.features_csv,
+                dtype=dict.fromkeys(feature_columns, np.float32),
+                engine=CSV_ENGINE
+            )
         print(f"  ✓ Loaded {len(df)} contracts")
 
-        # Define feature columns (60 features)
-        feature_columns = [
-            'hasOwnershipTransfer', 'hasRenounceOwnership', 'ownerBalance', 'ownerTransactionCount',
-            'multipleOwners', 'ownershipChangedRecently', 'ownerContractAge', 'ownerIsContract',
-            'ownerBlacklisted', 'ownerVerified',
-            'hasLiquidityLock', 'liquidityPoolSize', 'liquidityRatio', 'hasUniswapV2',
-            'hasPancakeSwap', 'liquidityLockedDays', 'liquidityProvidedByOwner', 'multiplePoolsExist',
-            'poolCreatedRecently', 'lowLiquidityWarning', 'rugpullHistoryOnDEX', 'slippageTooHigh',
-            'holderCount', 'holderConcentration', 'top10HoldersPercent', 'averageHoldingTime',
-            'suspiciousHolderPatterns', 'whaleCount', 'holderGrowthRate', 'dormantHolders',
-            'newHoldersSpiking', 'sellingPressure',
-            'hasHiddenMint', 'hasPausableTransfers', 'hasBlacklist', 'hasWhitelist',
-            'hasTimelocks', 'complexityScore', 'hasProxyPattern', 'isUpgradeable',
-            'hasExternalCalls', 'hasSelfDestruct', 'hasDelegateCall', 'hasInlineAssembly',
-            'verifiedContract', 'auditedByFirm', 'openSourceCode',
-            'avgDailyTransactions', 'transactionVelocity', 'uniqueInteractors', 'suspiciousPatterns',
-            'highFailureRate', 'gasOptimized', 'flashloanInteractions', 'frontRunningDetected',
-            'contractAge', 'lastActivityDays', 'creationBlock', 'deployedDuringBullMarket',
-            'launchFairness'
-        ]
-
-        # Extract features and labels
-        X = df[feature_columns].values
-
         # Convert labels to numeric (low_risk=0, medium_risk=1, high_risk=2)
         label_mapping = {'low_risk': 0, 'medium_risk': 1, 'high_risk': 2}
-        y = df['label'].map(label_mapping).values
+        y = df['label'].map(label_mapping).to_numpy(dtype=np.int8, na_value=-1)
+
+        # Rows with an unrecognized label can't be trained on
+        known = y >= 0
+        if not known.all():
+            print(f"  ⚠ Dropping {int((~known).sum())} rows with unknown labels")
+            df = df[known]
+            y = y[known]
+
+        # Extract features as float32: trees only compare values. The largest
+        # feature, creationBlock (~2e7), is past 2^24 and rounds to the
+        # nearest 2 blocks, which no split can notice
+        # A one-dtype frame converts to a column-major array; make it row-major
+        # once here rather than inside every sklearn/onnxruntime call
+        X = np.ascontiguousarray(df[feature_columns].to_numpy(dtype=np.float32))
 
         # Fill NaN values with 0
-        X = np.nan_to_num(X, nan=0.0)
+        np.nan_to_num(X, copy=False, nan=0.0)  # in place; X is already our own float32 copy
 
         print(f"  ✓ Feature matrix shape: {X.shape}")
         print(f"  ✓ Labels shape: {y.shape}")
@@ -90,46 +161,111 @@ class RealDataModelTrainer:
 
         return X, y, feature_columns
 
+    def load_warm_state(self, model, data_sha):
+        """
+        Return the saved forest state if `model` can be grown from it, else None
+
+        The saved forest must have been fit on the same training split with the
+        same settings, and may have at most as many trees as requested.
+        """
+        if not self.forest_path.exists():
+            print("  ⚠ No saved forest to warm-start from; training from scratch")
+            return None
+
+        state = joblib.load(self.forest_path)
+        saved = state['model']
+        ignore = ('n_estimators', 'warm_start', 'n_jobs')
+        same_params = ({k: v for k, v in saved.get_params().items() if k not in ignore}
+                       == {k: v for k, v in model.get_params().items() if k not in ignore})
+
+        if state['data_sha'] != data_sha or not same_params:
+            print("  ⚠ Saved forest was trained on other data or settings; training from scratch")
+            return None
+        if saved.n_estimators > self.n_estimators:
+            print(f"  ⚠ Saved forest already has {saved.n_estimators} trees; training from scratch")
+            return None
+        return state
+
     def train_and_evaluate(self, X, y, feature_columns):
         """Train model and perform comprehensive evaluation"""
 
         print("\n[2] Training and evaluating model...")
 
-        # Split data: 70% train, 15% validation, 15% test
-        X_train_val, X_test, y_train_val, y_test = train_test_split(
-            X, y, test_size=0.15, random_state=42, stratify=y
-        )
-        X_train, X_val, y_train, y_val = train_test_split(
-            X_train_val, y_train_val, test_size=0.176, random_state=42, stratify=y_train_val
-        )  # 0.176 of 0.85 ≈ 0.15 of total
+        # Split data: 70% train, 15% validation, 15% test. Split row indices
+        # (stratified), then gather each part from X once; no train+val copy
+        outer = StratifiedShuffleSplit(n_splits=1, test_size=0.15, random_state=42)
+        train_val_idx, test_idx = next(outer.split(np.zeros(len(y)), y))
+        inner = StratifiedShuffleSplit(n_splits=1, test_size=0.176, random_state=42)  # 0.176 of 0.85 ≈ 0.15 of total
+        train_pos, val_pos = next(inner.split(np.zeros(len(train_val_idx)), y[train_val_idx]))
+        train_idx, val_idx = train_val_idx[train_pos], train_val_idx[val_pos]
+
+        X_train, y_train = X[train_idx], y[train_idx]
+        X_val, y_val = X[val_idx], y[val_idx]
+        X_test, y_test = X[test_idx], y[test_idx]
 
         print(f"\n  Dataset splits:")
         print(f"    Train: {len(X_train)} samples ({100 * len(X_train) / len(X):.1f}%)")
         print(f"    Validation: {len(X_val)} samples ({100 * len(X_val) / len(X):.1f}%)")
         print(f"    Test: {len(X_test)} samples ({100 * len(X_test) / len(X):.1f}%)")
 
+        # Depth beyond ~log2(n) + 3 only memorizes single samples; capping it
+        # keeps the trees (and the exported graph) proportional to the data
+        self.max_depth = min(25, int(np.ceil(np.log2(max(len(X_train), 2)))) + 3)
+
         # Train model with hyperparameter tuning
-        print("\n  Training RandomForest classifier...")
+        print(f"\n  Training RandomForest classifier (max_depth={self.max_depth})...")
         model = RandomForestClassifier(
-            n_estimators=200,  # Increased from 100
-            max_depth=25,      # Increased from 20
+            n_estimators=self.n_estimators,
+            max_depth=self.max_depth,
             min_samples_split=5,
             min_samples_leaf=2,
             max_features='sqrt',  # Added for better generalization
             random_state=42,
-            n_jobs=-1,
-            class_weight='balanced'  # Handle class imbalance
+            n_jobs=1,  # one core per forest; the CV folds run in parallel instead
+            class_weight='balanced',  # Handle class imbalance
+            ccp_alpha=1e-4,  # Prune splits that barely reduce impurity: smaller trees, smaller ONNX
+            warm_start=True  # later fits with a larger n_estimators only add trees
         )
-        model.fit(X_train, y_train)
+
+        data_sha = hashlib.sha1(X_train.tobytes() + y_train.tobytes()).hexdigest()
+        state = self.load_warm_state(model, data_sha) if self.warm_start else None
+
+        if state is not None:
+            # Add trees to the saved forest on the rows it was fit on; the CV
+            # scores are the saved run's
+            model, fit_idx, cv_scores = state['model'], state['fit_idx'], state['cv_scores']
+            print(f"  Growing saved forest from {model.n_estimators} to {self.n_estimators} trees...")
+            model.set_params(n_estimators=self.n_estimators)
+            model.fit(X_train[fit_idx], y_train[fit_idx])
+        else:
+            # 5-fold CV on the training split doubles as the training run: the
+            # best fold's forest is kept instead of fitting a sixth one, and the
+            # validation/test splits stay unseen by every fold
+            cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+            # Folds run as threads (tree building releases the GIL), sharing
+            # X_train instead of pickling it into loky worker processes
+            with joblib.parallel_backend('threading', n_jobs=cv.get_n_splits()):
+                cv_result = cross_validate(model, X_train, y_train, cv=cv, scoring='accuracy',
+                                           n_jobs=cv.get_n_splits(), return_estimator=True,
+                                           return_indices=True)
+            cv_scores = cv_result['test_score']
+            best = int(np.argmax(cv_scores))
+            model = cv_result['estimator'][best]
+            fit_idx = cv_result['indices']['train'][best]
         print("  ✓ Training complete")
 
+        # Keep the fitted forest so a later --warm-start run can add trees to it
+        joblib.dump({'model': model, 'fit_idx': fit_idx, 'cv_scores': cv_scores,
+                     'data_sha': data_sha}, self.forest_path, compress=JOBLIB_COMPRESS)
+
         # Evaluate on validation set
         print("\n  Evaluating on validation set...")
         y_val_pred = model.predict(X_val)
         val_accuracy = accuracy_score(y_val, y_val_pred)
         print(f"  Validation Accuracy: {val_accuracy:.3f}")
 
-        # Evaluate on test set
+        # Evaluate on test set (kept for the ONNX parity check at export)
+        self.X_test = X_test
         print("\n[3] Final evaluation on test set...")
         y_test_pred = model.predict(X_test)
         y_test_proba = model.predict_proba(X_test)
@@ -163,21 +299,18 @@ class RealDataModelTrainer:
         if len(cm) > 2:
             print(f"         High   {cm[2][0]:4d}   {cm[2][1]:4d}   {cm[2][2]:4d}")
 
-        # Cross-validation
-        print("\n[4] Performing 5-fold cross-validation...")
-        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-        cv_scores = cross_val_score(model, X, y, cv=cv, scoring='accuracy', n_jobs=-1)
+        # Cross-validation (computed during training)
+        print("\n[4] 5-fold cross-validation on the training split...")
         print(f"  CV Scores: {cv_scores}")
         print(f"  Mean CV Accuracy: {cv_scores.mean():.3f} (±{cv_scores.std() * 2:.3f})")
 
         # Feature importance
         print("\n[5] Analyzing feature importance...")
         importances = model.feature_importances_
-        indices = np.argsort(importances)[::-1]
+        indices = top_k_indices(importances, 15)
 
         print("\n  Top 15 most important features:")
-        for i in range(min(15, len(indices))):
-            idx = indices[i]
+        for i, idx in enumerate(indices):
             print(f"    {i+1:2d}. {feature_columns[idx]:30s} {importances[idx]:.4f}")
 
         # Save feature importance
@@ -218,6 +351,7 @@ class RealDataModelTrainer:
             target_opset=15,
             options={id(model): {"zipmap": False}}
         )
+        downcast_double_initializers(onnx_model)
 
         # Save ONNX model
         onnx_path = self.model_dir / 'rugdetector_v2_real.onnx'
@@ -225,7 +359,9 @@ class RealDataModelTrainer:
             f.write(onnx_model.SerializeToString())
 
         print(f"  ✓ ONNX model saved to: {onnx_path}")
-        print(f"  ✓ Model size: {os.path.getsize(onnx_path) / 1024:.1f} KB")
+        print(f"  ✓ Model size: {os.path.getsize(onnx_path) / 1024:.1f} KB "
+              f"(sklearn forest: {os.path.getsize(self.forest_path) / 1024:.1f} KB, {JOBLIB_COMPRESS[0]})")
+        check_onnx_parity(model, onnx_path, self.X_test)
 
         # Save metadata
         metadata = {
@@ -234,8 +370,8 @@ class RealDataModelTrainer:
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "model_type": "RandomForestClassifier",
             "training_data": "real_rugpull_dataset",
-            "num_trees": 200,
-            "max_depth": 25,
+            "num_trees": model.n_estimators,
+            "max_depth": self.max_depth,
             "input_features": 60,
             "output_classes": 3,
             "classes": ["low_risk", "medium_risk", "high_risk"],
@@ -256,36 +392,46 @@ class RealDataModelTrainer:
 
         report_path = self.model_dir / "training_report_v2.txt"
 
+        top10 = "\n".join(
+            f"  {i:2d}. {feature:30s} {importance:.4f}"
+            for i, (feature, importance) in enumerate(metrics['feature_importance_top10'].items(), 1)
+        )
+        rule = "=" * 70
+
+        report = f"""{rule}
+RugDetector v2.0 Training Report (Real Data)
+Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+{rule}
+
+Model Configuration:
+  - Algorithm: RandomForestClassifier
+  - Number of trees: {self.n_estimators}
+  - Max depth: {self.max_depth}
+  - Class weighting: balanced
+  - Cost-complexity pruning: ccp_alpha=1e-4
+  - Features: 60
+
+Performance Metrics:
+  - Test Accuracy: {metrics['accuracy']:.3f}
+  - Precision: {metrics['precision']:.3f}
+  - Recall: {metrics['recall']:.3f}
+  - F1-Score: {metrics['f1_score']:.3f}
+  - Validation Accuracy: {metrics['val_accuracy']:.3f}
+  - CV Mean Accuracy: {metrics['cv_mean']:.3f} (±{metrics['cv_std'] * 2:.3f})
+
+Top 10 Most Important Features:
+{top10}
+
+Comparison with v1.0 (Synthetic Data):
+  v1.0 Accuracy: 0.940 (synthetic data)
+  v2.0 Accuracy: {metrics['accuracy']:.3f} (real data)
+
+  Note: v2.0 performance on real data is the true indicator of
+  production performance. Synthetic data often overestimates accuracy.
+"""
+
         with open(report_path, 'w') as f:
-            f.write("=" * 70 + "\n")
-            f.write("RugDetector v2.0 Training Report (Real Data)\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 70 + "\n\n")
-
-            f.write("Model Configuration:\n")
-            f.write("  - Algorithm: RandomForestClassifier\n")
-            f.write("  - Number of trees: 200\n")
-            f.write("  - Max depth: 25\n")
-            f.write("  - Class weighting: balanced\n")
-            f.write("  - Features: 60\n\n")
-
-            f.write("Performance Metrics:\n")
-            f.write(f"  - Test Accuracy: {metrics['accuracy']:.3f}\n")
-            f.write(f"  - Precision: {metrics['precision']:.3f}\n")
-            f.write(f"  - Recall: {metrics['recall']:.3f}\n")
-            f.write(f"  - F1-Score: {metrics['f1_score']:.3f}\n")
-            f.write(f"  - Validation Accuracy: {metrics['val_accuracy']:.3f}\n")
-            f.write(f"  - CV Mean Accuracy: {metrics['cv_mean']:.3f} (±{metrics['cv_std'] * 2:.3f})\n\n")
-
-            f.write("Top 10 Most Important Features:\n")
-            for i, (feature, importance) in enumerate(metrics['feature_importance_top10'].items(), 1):
-                f.write(f"  {i:2d}. {feature:30s} {importance:.4f}\n")
-
-            f.write("\nComparison with v1.0 (Synthetic Data):\n")
-            f.write("  v1.0 Accuracy: 0.940 (synthetic data)\n")
-            f.write(f"  v2.0 Accuracy: {metrics['accuracy']:.3f} (real data)\n")
-            f.write("\n  Note: v2.0 performance on real data is the true indicator of\n")
-            f.write("  production performance. Synthetic data often overestimates accuracy.\n")
+            f.write(report)
 
         print(f"\n  ✓ Training report saved to {report_path}")
 
@@ -326,8 +472,12 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Train RugDetector model on real data")
     parser.add_argument("features_csv", help="CSV file with extracted features")
+    parser.add_argument("--n-estimators", type=int, default=200, help="Number of trees (default: 200)")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="Add trees to the forest saved by the previous run instead of retraining")
 
     args = parser.parse_args()
 
-    trainer = RealDataModelTrainer(features_csv=args.features_csv)
+    trainer = RealDataModelTrainer(features_csv=args.features_csv, n_estimators=args.n_estimators,
+                                   warm_start=args.warm_start)
     trainer.run()